@@ -1,11 +1,22 @@
 import os
 import json
+import time
+import logging
 import argparse
-from ollama import Client
+from safe_eval import evaluate
+from tool_registry import ToolRegistry
+from memory import ConversationMemory, SlidingWindowMemory, SummarizingMemory, ollama_summarizer
+from session_store import SessionStore
+from tool_executor import ToolExecutor
+from tool_cache import ToolCache, default_cache
+from telemetry import log, span, configure_logging, record_model_response, start_metrics_server, LOOP_ITERATIONS, TIME_TO_FIRST_TOKEN_SECONDS
 
 class CalculatorTool():
     """A tool for performing mathematical calculations"""
 
+    # The same expression always evaluates to the same result, so results can be cached
+    pure = True
+
     def get_schema(self):
         return {
             "name": "calculator",
@@ -25,7 +36,7 @@ class CalculatorTool():
     def execute(self, expression):
         """
         Evaluate mathematical expressions.
-        WARNING: This tutorial uses eval() for simplicity but it is not recommended for production use.
+        Uses the whitelisted evaluator in safe_eval instead of eval(), so only arithmetic is allowed.
 
         Args:
             expression (str): The mathematical expression to evaluate
@@ -33,8 +44,8 @@ class CalculatorTool():
             float: The result of the evaluation
         """
         try:
-            print(f"DEBUG: Using calculator tool to evaluate: {expression}")
-            result = eval(expression)
+            log(logging.DEBUG, "Using calculator tool", expression=expression)
+            result = evaluate(expression)
             return {"result": result}
         except Exception as e:
             return {"error": f"Invalid mathematical expression: {str(e)}"}
@@ -42,105 +53,297 @@ class CalculatorTool():
 class Agent:
     """A simple AI agent that can use tools to answer questions in a multi-turn conversation"""
 
-    def __init__(self, model='granite4:tiny-h', tools=None):
-        self.client = Client()
+    def __init__(self, model='granite4:tiny-h', tools=None, client=None, memory=None, tool_execution="sequential", max_concurrency=4, tool_timeout=None, tool_cache=None, keep_alive="30m", strategy=None):
+        if client is None:
+            # ollama (and the pydantic models it defines) is only imported once a client is needed
+            from ollama import Client
+            client = Client()
+        self.client = client
         self.model = model
-        self.messages = [{'role': 'system', 'content': "You are a helpful assistant. You MUST use the calculator tool for any mathematical calculations to ensure accuracy. For all other questions, answer directly."}]
+        # Optional model_strategy.ModelStrategy that answers each call with one of several models.
+        # Streaming always uses model, since a stream cannot be judged until it has finished.
+        self.strategy = strategy
+        self.last_model = None
+        # How long Ollama keeps the model loaded after each call; idle gaps shorter than this avoid a cold load
+        self.keep_alive = keep_alive
+        # Ollama's duration breakdown of the most recent model call, see telemetry.model_timings
+        self.last_timings = None
+        # The memory manager owns the message list and keeps it within its token budget
+        self.memory = memory or ConversationMemory()
+        self.messages = self.memory.messages
+        self.memory.append({'role': 'system', 'content': "You are a helpful assistant. You MUST use the calculator tool for any mathematical calculations to ensure accuracy. For all other questions, answer directly."})
         self.tools = tools or []
-        self.tool_map = {tool.get_schema()["name"]: tool for tool in self.tools}
+        # Schemas and the tools payload are computed once here, not on every model call
+        self.registry = ToolRegistry(self.tools)
+        self.tool_map = self.registry.tools
+        # Tool results are shared through the process-wide cache unless tool_cache is given (or False to disable it)
+        self.tool_cache = default_cache if tool_cache is None else (tool_cache or None)
+        self.tool_executor = ToolExecutor(mode=tool_execution, max_concurrency=max_concurrency, timeout=tool_timeout, cache=self.tool_cache)
+
+    def reset(self):
+        """Start a new conversation, keeping the system prompt, tools, executor and client"""
+        self.memory.restore(self.messages[:1])
 
     def _get_tool_schemas(self):
-        return [tool.get_schema() for tool in self.tools]
+        return self.registry.payload
+
+    def _chat_request(self, **kwargs):
+        # The system prompt comes first and the tools payload is built once in registration
+        # order, so every call starts with the same bytes and can hit the backend's prefix cache
+        request = dict(model=self.model, messages=self.messages, tools=self._get_tool_schemas(), keep_alive=self.keep_alive)
+        request.update(kwargs)
+        return request
+
+    def _models(self):
+        return self.strategy.models if self.strategy else [self.model]
+
+    def _warm_up_request(self):
+        # Only the system prompt: loads the model and caches the prefix shared by every conversation
+        return self._chat_request(messages=self.messages[:1], options={"num_predict": 1})
+
+    def warm_up(self):
+        """
+        Load the model (every model of the strategy, if there is one) and evaluate
+        the system prompt and tools before the first question.
+
+        Returns:
+            dict: The first model's warm-up timings, see telemetry.model_timings
+        """
+        timings = []
+        for model in self._models():
+            with span("agent.warm_up", model=model):
+                start = time.perf_counter()
+                response = self.client.chat(**dict(self._warm_up_request(), model=model))
+                timings.append(record_model_response(model, response, time.perf_counter() - start))
+        return timings[0]
+
+    def _resolve_tool_call(self, tool_call):
+        """
+        Work out which tool a tool call refers to, inferring it when the model
+        sends an empty or unknown tool name.
+
+        Args:
+            tool_call: A tool call object from the model response
+        Returns:
+            tuple: (tool_name, tool_args), or None if no tool could be matched
+        """
+        log(logging.DEBUG, "Received tool call", tool_call=tool_call)
+        tool_name = tool_call['function']['name']
+        tool_args = tool_call['function']['arguments']
+
+        # Handle empty tool names or mismatched arguments
+        if not tool_name or tool_name not in self.tool_map:
+            log(logging.DEBUG, "Tool name not found, attempting to infer", tool=tool_name)
+
+            # If we only have one tool and arguments are provided, use it
+            if len(self.tool_map) == 1:
+                tool_name = list(self.tool_map.keys())[0]
+                schema = self.registry.schema(tool_name)
+
+                # Try to map the arguments to the expected format
+                expected_props = schema['input_schema']['properties']
+
+                # Check if arguments match expected properties
+                if 'expression' in expected_props and 'expression' in tool_args:
+                    log(logging.DEBUG, "Using tool with expression argument", tool=tool_name)
+                elif 'expression' in expected_props and ('num1' in tool_args or 'num2' in tool_args):
+                    # Convert num1 and num2 to expression format
+                    if 'num1' in tool_args and 'num2' in tool_args:
+                        tool_args = {'expression': f"{tool_args['num1']} * {tool_args['num2']}"}
+                        log(logging.DEBUG, "Converted num1/num2 to expression", expression=tool_args['expression'])
+                else:
+                    log(logging.DEBUG, "Could not map arguments to tool schema", tool=tool_name, arguments=tool_args)
+                    return None
+            else:
+                # Try to match based on argument keys
+                inferred = self.registry.infer(tool_args)
+                if inferred:
+                    tool_name = inferred
+                    log(logging.DEBUG, "Inferred tool name from arguments", tool=tool_name)
+
+        if tool_name not in self.tool_map:
+            log(logging.WARNING, "Unknown tool", tool=tool_name)
+            return None
+        return tool_name, tool_args
+
+    def _prepare_tool_calls(self, tool_calls):
+        """Resolve the tool calls of one model turn into (tool_name, tool, tool_args) tuples"""
+        calls = []
+        for tool_call in tool_calls:
+            resolved = self._resolve_tool_call(tool_call)
+            if resolved:
+                tool_name, tool_args = resolved
+                calls.append((tool_name, self.tool_map[tool_name], tool_args))
+        return calls
+
+    def _append_tool_results(self, results):
+        # Results arrive in call order, so the tool messages line up with the tool calls
+        for result in results:
+            self.memory.append({
+                'role': 'tool',
+                'content': json.dumps(result)
+            })
+
+    def _call_model(self):
+        """Send the conversation to the model and record latency and token counts"""
+        if self.strategy is not None:
+            self.last_model, response, self.last_timings = self.strategy.call(self, self._chat_request())
+            return response
+        with span("agent.model_call", model=self.model):
+            start = time.perf_counter()
+            response = self.client.chat(**self._chat_request())
+            self.last_model = self.model
+            self.last_timings = record_model_response(self.model, response, time.perf_counter() - start)
+        return response
+
+    def _stream_model(self):
+        """Stream the model's response chunks, recording time to first token"""
+        with span("agent.model_call", model=self.model, stream=True):
+            start = time.perf_counter()
+            first_token = True
+            for chunk in self.client.chat(**self._chat_request(stream=True)):
+                if first_token:
+                    TIME_TO_FIRST_TOKEN_SECONDS.labels(self.model).observe(time.perf_counter() - start)
+                    first_token = False
+                if chunk.get('done'):
+                    self.last_timings = record_model_response(self.model, chunk, time.perf_counter() - start)
+                yield chunk
 
     def chat(self, message):
         """Process a user message and return a response"""
-        self.messages.append({"role": "user", "content": message})
-
-        response = self.client.chat(
-            model=self.model,
-            messages=self.messages,
-            tools=self._get_tool_schemas(),
-        )
-
-        self.messages.append(response['message'])
-
-        # Process tool calls in a loop until we get a final response
-        while response['message'].get("tool_calls"):
-            tool_calls = response['message']["tool_calls"]
-            
-            for tool_call in tool_calls:
-                print(f"DEBUG: Received tool call object: {tool_call}")
-                tool_name = tool_call['function']['name']
-                tool_args = tool_call['function']['arguments']
-                
-                # Handle empty tool names or mismatched arguments
-                if not tool_name or tool_name not in self.tool_map:
-                    print(f"DEBUG: Tool name '{tool_name}' not found, attempting to infer...")
-                    
-                    # If we only have one tool and arguments are provided, use it
-                    if len(self.tool_map) == 1:
-                        tool_name = list(self.tool_map.keys())[0]
-                        tool = self.tool_map[tool_name]
-                        schema = tool.get_schema()
-                        
-                        # Try to map the arguments to the expected format
-                        expected_props = schema['input_schema']['properties']
-                        
-                        # Check if arguments match expected properties
-                        if 'expression' in expected_props and 'expression' in tool_args:
-                            print(f"DEBUG: Using tool '{tool_name}' with expression argument")
-                        elif 'expression' in expected_props and ('num1' in tool_args or 'num2' in tool_args):
-                            # Convert num1 and num2 to expression format
-                            if 'num1' in tool_args and 'num2' in tool_args:
-                                tool_args = {'expression': f"{tool_args['num1']} * {tool_args['num2']}"}
-                                print(f"DEBUG: Converted num1/num2 to expression: {tool_args['expression']}")
-                        else:
-                            print(f"DEBUG: Could not map arguments to tool schema")
-                            continue
-                    else:
-                        # Try to match based on argument keys
-                        for name, tool in self.tool_map.items():
-                            schema = tool.get_schema()
-                            required_props = schema['input_schema'].get('properties', {}).keys()
-                            if any(key in tool_args for key in required_props):
-                                tool_name = name
-                                print(f"DEBUG: Inferred tool name as '{tool_name}' from arguments")
-                                break
-                        
-                        if tool_name not in self.tool_map:
-                            print(f"Unknown tool: {tool_name}")
-                            continue
-                
-                if tool_name in self.tool_map:
-                    tool = self.tool_map[tool_name]
-                    result = tool.execute(**tool_args)
-                    
-                    self.messages.append({
-                        'role': 'tool',
-                        'content': json.dumps(result)
-                    })
-                else:
-                    print(f"Unknown tool: {tool_name}")
+        with span("agent.chat", model=self.model):
+            self.memory.append({"role": "user", "content": message})
+
+            response = self._call_model()
+            self.memory.append(response['message'])
+            iterations = 1
+
+            # Process tool calls in a loop until we get a final response
+            while response['message'].get("tool_calls"):
+                calls = self._prepare_tool_calls(response['message']["tool_calls"])
+                self._append_tool_results(self.tool_executor.run(calls))
+
+                # Get next response from the model
+                response = self._call_model()
+                self.memory.append(response['message'])
+                iterations += 1
 
-            # Get next response from the model
-            response = self.client.chat(
-                model=self.model,
-                messages=self.messages,
-                tools=self._get_tool_schemas(),
-            )
-            self.messages.append(response['message'])
+            LOOP_ITERATIONS.observe(iterations)
+            return response['message']['content']
 
-        return response['message']['content']
+    def _stream_turn(self):
+        """Stream one model call, yielding content deltas and appending the assembled message"""
+        content = []
+        tool_calls = []
+        for chunk in self._stream_model():
+            delta = chunk['message']
+            if delta.get('content'):
+                content.append(delta['content'])
+                yield delta['content']
+            # Tool calls are buffered and only run once the model has finished the turn
+            if delta.get('tool_calls'):
+                tool_calls.extend(delta['tool_calls'])
+
+        message = {'role': 'assistant', 'content': ''.join(content)}
+        if tool_calls:
+            message['tool_calls'] = tool_calls
+        self.memory.append(message)
+
+    def stream_chat(self, message):
+        """Process a user message, yielding the response text as it is generated"""
+        self.memory.append({"role": "user", "content": message})
+
+        yield from self._stream_turn()
+        iterations = 1
+
+        # Run any requested tools, then resume streaming the follow-up turn
+        while self.messages[-1].get("tool_calls"):
+            calls = self._prepare_tool_calls(self.messages[-1]["tool_calls"])
+            self._append_tool_results(self.tool_executor.run(calls))
+            yield from self._stream_turn()
+            iterations += 1
+
+        LOOP_ITERATIONS.observe(iterations)
 
 if __name__ == "__main__":
+    # Only the command line needs these; importing agent_loop as a library does not
+    import model_strategy
+    import replay
     parser = argparse.ArgumentParser(description="A simple AI agent using Ollama with tool-use capabilities.")
     parser.add_argument("--model", type=str, default="qwen3:8b", help="The Ollama model to use.")
-    parser.add_argument("question", type=str, help="The question to ask the agent.")
+    parser.add_argument("--tool-execution", choices=ToolExecutor.MODES, default="sequential", help="Run the tool calls of a turn one by one or concurrently.")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="Maximum number of tool calls running at once in concurrent mode.")
+    parser.add_argument("--tool-timeout", type=float, default=None, help="Per-tool timeout in seconds for concurrent mode.")
+    parser.add_argument("--stream", action="store_true", help="Print the answer as it is generated.")
+    parser.add_argument("--max-context-tokens", type=int, default=None, help="Token budget for the conversation history sent to the model.")
+    parser.add_argument("--summarize", action="store_true", help="Summarize turns evicted from the context window instead of dropping them.")
+    parser.add_argument("--keep-alive", type=str, default="30m", help="How long Ollama keeps the model loaded between calls, e.g. 30m, 1h, or --keep-alive=-1m to keep it loaded (the = is needed for a negative value).")
+    parser.add_argument("--no-warm-up", action="store_true", help="Skip loading the model and system prompt before asking the question.")
+    parser.add_argument("--no-tool-cache", action="store_true", help="Run every tool call, even repeated calls to pure tools.")
+    parser.add_argument("--tool-cache-db", type=str, default=None, help="SQLite file to share cached tool results between processes.")
+    parser.add_argument("--session", type=str, default=None, help="Save the conversation under this name and continue it on the next run.")
+    parser.add_argument("--db", type=str, default="sessions.db", help="SQLite file that stores the sessions.")
+    parser.add_argument("--log-level", type=str, default="WARNING", help="Log level, e.g. DEBUG to see tool calls.")
+    parser.add_argument("--log-json", action="store_true", help="Write logs as one JSON object per line.")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port.")
+    model_strategy.add_arguments(parser)
+    replay.add_arguments(parser)
+    parser.add_argument("--input", type=str, default=None, help="Answer every question in this JSONL file (- for stdin) instead of one question. See batch_runner.py.")
+    parser.add_argument("question", type=str, nargs="?", help="The question to ask the agent.")
+    # Imported here because batch_runner builds on this module
+    import batch_runner
+    batch_runner.add_arguments(parser.add_argument_group("batch mode (with --input)"))
     args = parser.parse_args()
+    if args.input is None and args.question is None:
+        parser.error("give a question, or --input with a JSONL file of questions")
+
+    configure_logging(args.log_level, as_json=args.log_json)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    if args.input is not None:
+        import asyncio
+        stats = asyncio.run(batch_runner.main(args))
+        raise SystemExit(1 if stats.failed else 0)
+
+    def make_client():
+        from ollama import Client
+        return Client()
+
+    tool_cache = None if args.no_tool_cache else ToolCache(db_path=args.tool_cache_db) if args.tool_cache_db else default_cache
+    client, tool_cache, recorder = replay.from_args(args, make_client, tool_cache)
+    memory = None
+    if args.max_context_tokens and args.summarize:
+        memory = SummarizingMemory(ollama_summarizer(client, args.model), max_tokens=args.max_context_tokens)
+    elif args.max_context_tokens:
+        memory = SlidingWindowMemory(max_tokens=args.max_context_tokens)
 
     calculator_tool = CalculatorTool()
-    agent = Agent(model=args.model, tools=[calculator_tool])
+    agent = Agent(
+        model=args.model,
+        tools=[calculator_tool],
+        client=client,
+        memory=memory,
+        tool_execution=args.tool_execution,
+        max_concurrency=args.max_concurrency,
+        tool_timeout=args.tool_timeout,
+        tool_cache=tool_cache or False,
+        keep_alive=args.keep_alive,
+        strategy=model_strategy.from_args(args),
+    )
+    if not args.no_warm_up:
+        agent.warm_up()
+    if args.session:
+        SessionStore(args.db).attach(args.session, agent.memory)
 
     print(f"\nQuestion: {args.question}")
-    assistant_message = agent.chat(args.question)
-    print(f"\nAgent: {assistant_message}")
\ No newline at end of file
+    if args.stream:
+        print("\nAgent: ", end="", flush=True)
+        for delta in agent.stream_chat(args.question):
+            print(delta, end="", flush=True)
+        print()
+    else:
+        assistant_message = agent.chat(args.question)
+        print(f"\nAgent: {assistant_message}")
+    if recorder is not None:
+        recorder.close()
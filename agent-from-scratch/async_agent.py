@@ -0,0 +1,155 @@
+import time
+import asyncio
+import argparse
+from agent_loop import Agent, CalculatorTool
+from telemetry import span, record_model_response, LOOP_ITERATIONS, TIME_TO_FIRST_TOKEN_SECONDS
+
+# One pooled AsyncClient per Ollama host, shared by every AsyncAgent in the process
+_shared_clients = {}
+
+def get_shared_client(host=None, max_connections=200, max_keepalive_connections=50):
+    """
+    Return the process-wide AsyncClient for an Ollama host, creating it on first use.
+
+    Args:
+        host (str): Ollama host URL, defaults to OLLAMA_HOST or the local server
+        max_connections (int): Upper bound on open HTTP connections to the host
+        max_keepalive_connections (int): Idle connections kept open for reuse
+    Returns:
+        AsyncClient: The shared client
+    """
+    if host not in _shared_clients:
+        import httpx
+        from ollama import AsyncClient
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        _shared_clients[host] = AsyncClient(host=host, limits=limits)
+    return _shared_clients[host]
+
+async def close_shared_clients():
+    """Close every shared client. Call this before the event loop shuts down."""
+    while _shared_clients:
+        _, client = _shared_clients.popitem()
+        await client.close()
+
+class AsyncAgent(Agent):
+    """An asyncio version of the agent loop that shares one pooled HTTP client across agents"""
+
+    def __init__(self, model='granite4:tiny-h', tools=None, client=None, **kwargs):
+        super().__init__(model=model, tools=tools, client=client or get_shared_client(), **kwargs)
+
+    async def warm_up(self):
+        """Load the model and evaluate the system prompt and tools. See Agent.warm_up()."""
+        timings = []
+        for model in self._models():
+            with span("agent.warm_up", model=model):
+                start = time.perf_counter()
+                response = await self.client.chat(**dict(self._warm_up_request(), model=model))
+                timings.append(record_model_response(model, response, time.perf_counter() - start))
+        return timings[0]
+
+    async def _call_model(self):
+        """Send the conversation to the model and record latency and token counts"""
+        if self.strategy is not None:
+            self.last_model, response, self.last_timings = await self.strategy.acall(self, self._chat_request())
+            return response
+        with span("agent.model_call", model=self.model):
+            start = time.perf_counter()
+            response = await self.client.chat(**self._chat_request())
+            self.last_model = self.model
+            self.last_timings = record_model_response(self.model, response, time.perf_counter() - start)
+        return response
+
+    async def _stream_model(self):
+        """Stream the model's response chunks, recording time to first token"""
+        with span("agent.model_call", model=self.model, stream=True):
+            start = time.perf_counter()
+            first_token = True
+            async for chunk in await self.client.chat(**self._chat_request(stream=True)):
+                if first_token:
+                    TIME_TO_FIRST_TOKEN_SECONDS.labels(self.model).observe(time.perf_counter() - start)
+                    first_token = False
+                if chunk.get('done'):
+                    self.last_timings = record_model_response(self.model, chunk, time.perf_counter() - start)
+                yield chunk
+
+    async def chat(self, message):
+        """Process a user message and return a response"""
+        with span("agent.chat", model=self.model):
+            self.memory.append({"role": "user", "content": message})
+
+            response = await self._call_model()
+            self.memory.append(response['message'])
+            iterations = 1
+
+            # Process tool calls in a loop until we get a final response
+            while response['message'].get("tool_calls"):
+                calls = self._prepare_tool_calls(response['message']["tool_calls"])
+                self._append_tool_results(await self.tool_executor.arun(calls))
+
+                # Get next response from the model
+                response = await self._call_model()
+                self.memory.append(response['message'])
+                iterations += 1
+
+            LOOP_ITERATIONS.observe(iterations)
+            return response['message']['content']
+
+    async def _stream_turn(self):
+        """Stream one model call, yielding content deltas and appending the assembled message"""
+        content = []
+        tool_calls = []
+        async for chunk in self._stream_model():
+            delta = chunk['message']
+            if delta.get('content'):
+                content.append(delta['content'])
+                yield delta['content']
+            if delta.get('tool_calls'):
+                tool_calls.extend(delta['tool_calls'])
+
+        message = {'role': 'assistant', 'content': ''.join(content)}
+        if tool_calls:
+            message['tool_calls'] = tool_calls
+        self.memory.append(message)
+
+    async def stream_chat(self, message):
+        """Process a user message, yielding the response text as it is generated"""
+        self.memory.append({"role": "user", "content": message})
+
+        async for delta in self._stream_turn():
+            yield delta
+        iterations = 1
+
+        while self.messages[-1].get("tool_calls"):
+            calls = self._prepare_tool_calls(self.messages[-1]["tool_calls"])
+            self._append_tool_results(await self.tool_executor.arun(calls))
+            async for delta in self._stream_turn():
+                yield delta
+            iterations += 1
+
+        LOOP_ITERATIONS.observe(iterations)
+
+async def main(args):
+    import model_strategy
+    strategy = model_strategy.from_args(args)
+    agents = [AsyncAgent(model=args.model, tools=[CalculatorTool()], keep_alive=args.keep_alive, strategy=strategy) for _ in args.question]
+    try:
+        # One warm-up loads the model and caches the shared system prompt for every conversation
+        await agents[0].warm_up()
+        answers = await asyncio.gather(*(agent.chat(question) for agent, question in zip(agents, args.question)))
+    finally:
+        await close_shared_clients()
+    for question, answer in zip(args.question, answers):
+        print(f"\nQuestion: {question}")
+        print(f"Agent: {answer}")
+
+if __name__ == "__main__":
+    import model_strategy
+    parser = argparse.ArgumentParser(description="Answer several questions concurrently with asyncio agents sharing one Ollama client.")
+    parser.add_argument("--model", type=str, default="qwen3:8b", help="The Ollama model to use.")
+    parser.add_argument("--keep-alive", type=str, default="30m", help="How long Ollama keeps the model loaded between calls, e.g. 30m, or --keep-alive=-1m to keep it loaded.")
+    model_strategy.add_arguments(parser)
+    parser.add_argument("question", type=str, nargs="+", help="One or more questions, each answered in its own conversation.")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,240 @@
+"""Answer a file of questions with the agent loop, many at a time.
+
+Input is JSONL, one question per line: ``{"id": "q1", "question": "..."}``
+(``prompt`` is accepted instead of ``question``; lines without an id use their
+line number). Each worker keeps one AsyncAgent, with its tool registry and
+executor, and starts a new conversation for every question. All workers share
+one pooled Ollama client, one warm model and one tool cache.
+
+Results are appended to the output JSONL as soon as each question finishes,
+so the output doubles as a checkpoint: rerunning the same command skips the
+ids that already have an answer and retries the ones that failed.
+
+    python batch_runner.py questions.jsonl --output answers.jsonl --workers 32
+    cat questions.jsonl | python batch_runner.py - --output answers.jsonl
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from agent_loop import CalculatorTool
+from async_agent import AsyncAgent, close_shared_clients, get_shared_client
+from telemetry import configure_logging
+from tool_cache import ToolCache, default_cache
+from tool_executor import ToolExecutor
+
+def completed_ids(output_path):
+    """Ids that already have an answer in an existing output file"""
+    done = set()
+    try:
+        with open(output_path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # A line cut short when the previous run was killed
+                    continue
+                if "error" in result:
+                    done.discard(result.get("id"))
+                else:
+                    done.add(result.get("id"))
+    except FileNotFoundError:
+        pass
+    return done
+
+def parse_line(line_number, line):
+    """Return (id, question) for one input line, or None for a blank line"""
+    line = line.strip()
+    if not line:
+        return None
+    item = json.loads(line)
+    if not isinstance(item, dict):
+        raise ValueError(f"line {line_number}: expected a JSON object")
+    question = item.get("question") or item.get("prompt")
+    if not question:
+        raise ValueError(f"line {line_number}: expected a 'question' or 'prompt' field")
+    return str(item.get("id", line_number)), question
+
+class BatchStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.answered = 0
+        self.failed = 0
+        self.skipped = 0
+        self.latencies = []
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        finished = self.answered + self.failed
+        return (
+            f"{self.answered} answered, {self.failed} failed, {self.skipped} skipped in {elapsed:.1f}s "
+            f"-> {finished / elapsed if elapsed else 0:.2f} questions/s, "
+            f"p50 {percentile(0.5):.2f}s, p99 {percentile(0.99):.2f}s"
+        )
+
+async def run_batch(lines, output, model, workers=8, timeout=None, skip=(), warm_up=True, progress_every=30.0, **agent_kwargs):
+    """
+    Answer every question from an iterable of JSONL lines, writing results to ``output``.
+
+    Args:
+        lines: Iterable of input lines (a file object or sys.stdin)
+        output: Writable text file; each result is written as one JSON line and flushed
+        model (str): The Ollama model to use
+        workers (int): Questions answered at once
+        timeout (float): Seconds allowed per question, or None
+        skip (set): Ids to leave out, e.g. those answered by a previous run
+        warm_up (bool): Load the model before the first question
+        progress_every (float): Seconds between progress lines on stderr
+        **agent_kwargs: Passed through to AsyncAgent
+    Returns:
+        BatchStats: Counts and latencies for the run
+    """
+    stats = BatchStats()
+    queue = asyncio.Queue(maxsize=workers * 2)
+    loop = asyncio.get_running_loop()
+
+    def write(result):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+
+    async def produce():
+        # Read lines off the event loop so a slow stdin does not stall the workers
+        iterator = iter(lines)
+        line_number = 0
+        while True:
+            line = await loop.run_in_executor(None, next, iterator, None)
+            if line is None:
+                break
+            line_number += 1
+            try:
+                item = parse_line(line_number, line)
+            except ValueError as e:
+                # A bad line is reported like a failed question rather than stopping the run
+                stats.failed += 1
+                write({"id": str(line_number), "error": f"{type(e).__name__}: {e}"})
+                continue
+            if item is None:
+                continue
+            if item[0] in skip:
+                stats.skipped += 1
+                continue
+            await queue.put(item)
+        for _ in range(workers):
+            await queue.put(None)
+
+    agents = [AsyncAgent(model=model, tools=[CalculatorTool()], **agent_kwargs) for _ in range(workers)]
+
+    async def work(agent):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            question_id, question = item
+            agent.reset()
+            start = time.perf_counter()
+            try:
+                answer = await asyncio.wait_for(agent.chat(question), timeout)
+            except Exception as e:
+                stats.failed += 1
+                write({"id": question_id, "question": question, "error": f"{type(e).__name__}: {e}", "seconds": time.perf_counter() - start})
+                continue
+            seconds = time.perf_counter() - start
+            stats.answered += 1
+            stats.latencies.append(seconds)
+            model_calls = sum(1 for m in agent.messages if m.get("role") == "assistant")
+            write({"id": question_id, "question": question, "answer": answer, "seconds": seconds, "model_calls": model_calls})
+
+    async def report_progress():
+        while True:
+            await asyncio.sleep(progress_every)
+            print(stats.report(), file=sys.stderr, flush=True)
+
+    progress = None
+    try:
+        # One warm-up loads the model and caches the system prompt every conversation starts with
+        if warm_up:
+            await agents[0].warm_up()
+        stats.started = time.perf_counter()
+        progress = asyncio.ensure_future(report_progress())
+        await asyncio.gather(produce(), *(work(agent) for agent in agents))
+    finally:
+        if progress is not None:
+            progress.cancel()
+        for agent in agents:
+            agent.tool_executor.shutdown()
+    return stats
+
+async def main(args):
+    # Imported here so that importing batch_runner as a library stays fast
+    import model_strategy
+    import replay
+    skip = completed_ids(args.output) if args.output and not args.no_resume else set()
+    source = sys.stdin if args.input == "-" else open(args.input)
+    output = open(args.output, "a") if args.output else sys.stdout
+    # One cache for the whole run, so repeated tool calls across questions are reused
+    tool_cache = None if args.no_tool_cache else ToolCache(db_path=args.tool_cache_db) if args.tool_cache_db else default_cache
+    client, tool_cache, recorder = replay.from_args(args, get_shared_client, tool_cache, asynchronous=True)
+    try:
+        stats = await run_batch(
+            source,
+            output,
+            args.model,
+            workers=args.workers,
+            timeout=args.timeout,
+            skip=skip,
+            warm_up=not args.no_warm_up,
+            keep_alive=args.keep_alive,
+            tool_execution=args.tool_execution,
+            max_concurrency=args.max_concurrency,
+            strategy=model_strategy.from_args(args),
+            tool_timeout=args.tool_timeout,
+            client=client,
+            tool_cache=tool_cache or False,
+        )
+    finally:
+        await close_shared_clients()
+        if recorder is not None:
+            recorder.close()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(stats.report(), file=sys.stderr)
+    return stats
+
+def add_arguments(parser):
+    """Batch options, shared with agent_loop.py's --input mode"""
+    parser.add_argument("--output", type=str, default=None, help="JSONL file to append results to (default: stdout). Also the checkpoint for resuming.")
+    parser.add_argument("--workers", type=int, default=8, help="Questions answered at once.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds allowed per question.")
+    parser.add_argument("--no-resume", action="store_true", help="Answer every question, even ones already in the output file.")
+
+if __name__ == "__main__":
+    import model_strategy
+    import replay
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with the agent loop.")
+    parser.add_argument("input", type=str, help="JSONL file of questions, or - for stdin.")
+    parser.add_argument("--model", type=str, default="qwen3:8b", help="The Ollama model to use.")
+    parser.add_argument("--keep-alive", type=str, default="30m", help="How long Ollama keeps the model loaded between calls, e.g. 30m, or --keep-alive=-1m to keep it loaded.")
+    parser.add_argument("--no-warm-up", action="store_true", help="Skip loading the model and system prompt before the first question.")
+    parser.add_argument("--tool-execution", choices=ToolExecutor.MODES, default="sequential", help="Run the tool calls of a turn one by one or concurrently.")
+    model_strategy.add_arguments(parser)
+    replay.add_arguments(parser)
+    parser.add_argument("--max-concurrency", type=int, default=4, help="Maximum number of tool calls running at once in concurrent mode.")
+    parser.add_argument("--tool-timeout", type=float, default=None, help="Per-tool timeout in seconds for concurrent mode.")
+    parser.add_argument("--no-tool-cache", action="store_true", help="Run every tool call, even repeated calls to pure tools.")
+    parser.add_argument("--tool-cache-db", type=str, default=None, help="SQLite file to share cached tool results between processes.")
+    parser.add_argument("--log-level", type=str, default="WARNING", help="Log level, e.g. DEBUG to see tool calls.")
+    parser.add_argument("--log-json", action="store_true", help="Write logs as one JSON object per line.")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    configure_logging(args.log_level, as_json=args.log_json)
+    stats = asyncio.run(main(args))
+    sys.exit(1 if stats.failed else 0)
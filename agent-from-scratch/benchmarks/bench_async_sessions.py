@@ -0,0 +1,57 @@
+"""Compare AsyncAgent against one blocking Agent per thread on a mock Ollama endpoint.
+
+Run from the agent-from-scratch directory:
+
+    python -m benchmarks.bench_async_sessions --sessions 200 --turns 3 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ollama import Client
+from agent_loop import Agent
+from async_agent import AsyncAgent, get_shared_client, close_shared_clients
+from benchmarks.mock_ollama import MockOllamaServer
+
+def run_threaded(url, sessions, turns, max_threads):
+    def session(i):
+        agent = Agent(model="mock", client=Client(host=url))
+        for turn in range(turns):
+            agent.chat(f"Session {i}, turn {turn}")
+
+    with ThreadPoolExecutor(max_workers=min(sessions, max_threads)) as pool:
+        list(pool.map(session, range(sessions)))
+
+async def run_async(url, sessions, turns):
+    client = get_shared_client(url)
+
+    async def session(i):
+        agent = AsyncAgent(model="mock", client=client)
+        for turn in range(turns):
+            await agent.chat(f"Session {i}, turn {turn}")
+
+    try:
+        await asyncio.gather(*(session(i) for i in range(sessions)))
+    finally:
+        await close_shared_clients()
+
+def report(name, sessions, turns, elapsed):
+    print(f"{name:<10} {sessions} sessions x {turns} turns in {elapsed:.2f}s "
+          f"-> {sessions / elapsed:.1f} sessions/s, {sessions * turns / elapsed:.1f} turns/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent agent sessions against a mock Ollama server.")
+    parser.add_argument("--sessions", type=int, default=200, help="Number of concurrent conversations.")
+    parser.add_argument("--turns", type=int, default=3, help="User turns per conversation.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock model latency per call in seconds.")
+    parser.add_argument("--max-threads", type=int, default=64, help="Thread cap for the thread-per-conversation run.")
+    args = parser.parse_args()
+
+    with MockOllamaServer(latency=args.latency) as server:
+        start = time.perf_counter()
+        run_threaded(server.url, args.sessions, args.turns, args.max_threads)
+        report("threads", args.sessions, args.turns, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        asyncio.run(run_async(server.url, args.sessions, args.turns))
+        report("asyncio", args.sessions, args.turns, time.perf_counter() - start)
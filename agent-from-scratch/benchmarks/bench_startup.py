@@ -0,0 +1,131 @@
+"""Startup time of the agent scripts and the gateway, measured with ``python -X importtime``.
+
+Run from the agent-from-scratch directory:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --targets agent_loop,asgi_app --gateway-python ~/venvs/gateway/bin/python
+
+Every target is imported ``--repeat`` times in a fresh interpreter. The report
+shows the median import time and whole-process time, plus the slowest
+dependencies of the last run. The process exits with status 1 when a median
+import time is over its budget in BUDGETS_MS, so CI can run this as a check
+that keeps heavy packages (ollama, numpy, litellm) loading lazily.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from benchmarks.bench_suite import GATEWAY_DIR
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time budgets in milliseconds, about twice what the module needs on a laptop
+BUDGETS_MS = {
+    "simple_agent": 50,
+    "conversational_memory": 50,
+    "tool_use": 100,
+    "agent_loop": 120,
+    "async_agent": 120,
+    "batch_runner": 120,
+    "app": 300,
+    "asgi_app": 300,
+}
+
+GATEWAY_TARGETS = ("app", "asgi_app")
+
+def parse_importtime(stderr, module):
+    """
+    Read the ``-X importtime`` report for ``import module``.
+
+    Returns:
+        tuple: (cumulative microseconds for the module, [(microseconds, name)] of its direct imports)
+    """
+    total = None
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0 and name.strip() == module:
+            total = int(cumulative)
+        elif depth == 1:
+            # A module's imports are listed before it, so collect them and keep the last batch
+            children.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            children = []
+    if total is None:
+        raise RuntimeError(f"no import time reported for {module}:\n{stderr[-2000:]}")
+    return total, sorted(children, reverse=True)
+
+def measure(target, python, repeat):
+    """Import one target ``repeat`` times in a fresh interpreter"""
+    gateway = target in GATEWAY_TARGETS
+    env = dict(os.environ)
+    if gateway:
+        env["LITELLM_LOCAL_MODEL_COST_MAP"] = "True"
+    imports, processes = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [python, "-X", "importtime", "-c", f"import {target}"],
+            cwd=GATEWAY_DIR if gateway else AGENT_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        processes.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"import {target} failed:\n{result.stderr[-2000:]}")
+        total, children = parse_importtime(result.stderr, target)
+        imports.append(total / 1000)
+    return {
+        "target": target,
+        "import_ms": statistics.median(imports),
+        "process_ms": statistics.median(processes) * 1000,
+        "budget_ms": BUDGETS_MS.get(target),
+        "slowest": [(name, us / 1000) for us, name in children[:3]],
+    }
+
+def print_results(results):
+    print(f"{'target':<22} {'import ms':>10} {'process ms':>11} {'budget ms':>10}  slowest imports")
+    for result in results:
+        budget = f"{result['budget_ms']:.0f}" if result["budget_ms"] else "-"
+        slowest = ", ".join(f"{name} {ms:.0f}" for name, ms in result["slowest"])
+        flag = " OVER" if result["over_budget"] else ""
+        print(f"{result['target']:<22} {result['import_ms']:>10.1f} {result['process_ms']:>11.1f} {budget:>10}{flag:5}  {slowest}")
+
+if __name__ == "__main__":
+    targets = list(BUDGETS_MS)
+    parser = argparse.ArgumentParser(description="Measure and check the import time of the agent scripts and the gateway.")
+    parser.add_argument("--targets", type=str, default=",".join(targets), help=f"Comma-separated subset of {', '.join(targets)}.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target; the median is reported.")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every budget, e.g. 2 on a slow CI runner.")
+    parser.add_argument("--gateway-python", type=str, default=sys.executable, help="Interpreter with the litellm-kubernetes requirements installed.")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    selected = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = [target for target in selected if target not in targets]
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(unknown)}")
+
+    results = []
+    for target in selected:
+        python = args.gateway_python if target in GATEWAY_TARGETS else sys.executable
+        result = measure(target, python, args.repeat)
+        result["budget_ms"] *= args.budget_scale
+        result["over_budget"] = result["import_ms"] > result["budget_ms"]
+        results.append(result)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+    over = [result["target"] for result in results if result["over_budget"]]
+    if over:
+        print(f"\nOver the import time budget: {', '.join(over)}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,247 @@
+"""Offline benchmarks for the agents and the LiteLLM gateway against a mock model server.
+
+Run from the agent-from-scratch directory:
+
+    python -m benchmarks.bench_suite --sessions 50 --turns 3 --concurrency 16
+    python -m benchmarks.bench_suite --targets agent_loop,gateway --token-rate 50 --json results.json
+
+Each target runs ``--sessions`` conversations of ``--turns`` user messages on
+``--concurrency`` threads and reports throughput, p50/p99 turn latency and the
+Python heap allocated per session (measured with tracemalloc in a second pass,
+since tracing slows everything down). The gateway targets start
+``litellm-kubernetes`` in a subprocess, pointed at the mock's OpenAI-compatible
+endpoint, so ``--gateway-python`` must have its requirements installed.
+"""
+import argparse
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import httpx
+from ollama import Client
+import agent_loop
+import conversational_memory
+import simple_agent
+import tool_use
+from benchmarks.mock_ollama import MockOllamaServer
+from session_store import SessionStore
+
+GATEWAY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "litellm-kubernetes")
+
+# Every tool-using turn asks for one calculator call, then gets the text reply
+CALCULATOR_CALL = [{"function": {"name": "calculator", "arguments": {"expression": "12 * 4 + 10"}}}]
+
+def make_simple(url):
+    agent = simple_agent.Agent(model="mock", client=Client(host=url))
+    return agent, lambda message: agent.chat(message)['message']['content']
+
+def make_memory(url):
+    agent = conversational_memory.Agent(model="mock", client=Client(host=url))
+    return agent, agent.chat
+
+def make_tool_use(url):
+    agent = tool_use.Agent(model="mock", tools=[tool_use.CalculatorTool()], client=Client(host=url))
+    return agent, agent.chat
+
+def make_agent_loop(url):
+    agent = agent_loop.Agent(model="mock", tools=[agent_loop.CalculatorTool()], client=Client(host=url))
+    return agent, agent.chat
+
+# Streamed turns with tool calls, persisted message by message to SQLite
+_session_store = None
+_session_ids = itertools.count()
+
+def make_agent_loop_stream_session(url):
+    global _session_store
+    if _session_store is None:
+        _session_store = SessionStore(":memory:")
+    agent = agent_loop.Agent(model="mock", tools=[agent_loop.CalculatorTool()], client=Client(host=url))
+    _session_store.attach(f"bench-{next(_session_ids)}", agent.memory)
+    return agent, lambda message: "".join(agent.stream_chat(message))
+
+AGENTS = {
+    "simple_agent": make_simple,
+    "conversational_memory": make_memory,
+    "tool_use": make_tool_use,
+    "agent_loop": make_agent_loop,
+    "agent_loop_stream_session": make_agent_loop_stream_session,
+}
+
+# Gateway targets: the command that serves the app on a port, run from litellm-kubernetes
+GATEWAYS = {
+    "gateway": ["-m", "flask", "--app", "app", "run", "--with-threads", "--port", "{port}"],
+    "gateway_asgi": ["-m", "uvicorn", "asgi_app:app", "--log-level", "warning", "--port", "{port}"],
+}
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+def run_sessions(make_session, url, sessions, turns, concurrency):
+    """
+    Run the conversations and time every turn.
+
+    Returns:
+        tuple: (turn latencies in seconds, wall time, the session objects, which are kept alive)
+    """
+    latencies = []
+    kept = []
+
+    def session(i):
+        state, send = make_session(url)
+        kept.append(state)
+        for turn in range(turns):
+            start = time.perf_counter()
+            send(f"Session {i}, turn {turn}: what is 12 * 4 + 10?")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(sessions, concurrency)) as pool:
+        # list() re-raises the first failed session
+        list(pool.map(session, range(sessions)))
+    return latencies, time.perf_counter() - start, kept
+
+def memory_per_session(make_session, url, sessions, turns, concurrency):
+    """Bytes of Python heap still allocated per session after its conversation"""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        _, _, kept = run_sessions(make_session, url, sessions, turns, concurrency)
+        used = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del kept
+    return used / sessions
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class Gateway:
+    """Run one of the gateway apps in a subprocess for the duration of a with block"""
+
+    def __init__(self, target, mock_url, python, cwd=GATEWAY_DIR):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.command = [python] + [part.format(port=self.port) for part in GATEWAYS[target]]
+        self.cwd = cwd
+        self.env = {
+            **os.environ,
+            "MODEL_NAME": "openai/mock",
+            "API_BASE": f"{mock_url}/v1",
+            "API_KEY": "mock",
+            # The benchmark should measure the model path, not cache hits
+            "CACHE_ENABLED": "false",
+            # Warm up the backend before reporting ready, as in the Kubernetes deployment
+            "PREWARM": "true",
+            "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+        }
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, cwd=self.cwd, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{' '.join(self.command)} exited: {self.process.stderr.read().decode()[-2000:]}")
+            try:
+                # Only benchmark once the gateway has loaded LiteLLM and reports ready
+                if httpx.get(f"{self.url}/ready", timeout=60).status_code == 200:
+                    return self.url
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError(f"{' '.join(self.command)} did not start listening on port {self.port}")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+def make_gateway_session(url):
+    client = httpx.Client(base_url=url, timeout=60)
+    messages = []
+
+    def send(message):
+        messages.append({"role": "user", "content": message})
+        response = client.post("/chat", json={"messages": messages, "temperature": 0.7})
+        response.raise_for_status()
+        reply = response.json()["choices"][0]["message"]
+        messages.append({"role": "assistant", "content": reply["content"]})
+        return reply["content"]
+
+    return (client, messages), send
+
+def run_target(target, server, args):
+    if target in AGENTS:
+        context, make_session = contextlib.nullcontext(server.url), AGENTS[target]
+    else:
+        context, make_session = Gateway(target, server.url, args.gateway_python), make_gateway_session
+
+    with context as url:
+        requests_before = server.requests
+        latencies, elapsed, _ = run_sessions(make_session, url, args.sessions, args.turns, args.concurrency)
+        model_calls = server.requests - requests_before
+        # Gateway memory lives in the subprocess, so it is not traced here
+        memory = None
+        if not args.skip_memory and target in AGENTS:
+            memory = memory_per_session(make_session, url, args.sessions, args.turns, args.concurrency)
+
+    turns = len(latencies)
+    return {
+        "target": target,
+        "turns": turns,
+        "model_calls": model_calls,
+        "seconds": elapsed,
+        "turns_per_second": turns / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "kib_per_session": memory / 1024 if memory is not None else None,
+    }
+
+def print_results(results):
+    print(f"{'target':<26} {'turns':>6} {'calls':>6} {'turns/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'KiB/session':>12}")
+    for result in results:
+        memory = f"{result['kib_per_session']:.1f}" if result["kib_per_session"] is not None else "-"
+        print(f"{result['target']:<26} {result['turns']:>6} {result['model_calls']:>6} {result['turns_per_second']:>9.1f} "
+              f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} {memory:>12}")
+
+if __name__ == "__main__":
+    targets = list(AGENTS) + list(GATEWAYS)
+    parser = argparse.ArgumentParser(description="Benchmark the agents and the gateway against a mock model server.")
+    parser.add_argument("--targets", type=str, default=",".join(targets), help=f"Comma-separated subset of {', '.join(targets)}.")
+    parser.add_argument("--sessions", type=int, default=50, help="Conversations per target.")
+    parser.add_argument("--turns", type=int, default=3, help="User turns per conversation.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Conversations running at once.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock time to first token in seconds.")
+    parser.add_argument("--token-rate", type=float, default=None, help="Mock generation speed in tokens per second (default: instant).")
+    parser.add_argument("--reply", type=str, default="This is a mock reply.", help="Text the mock model answers with.")
+    parser.add_argument("--gateway-python", type=str, default=sys.executable, help="Interpreter with the litellm-kubernetes requirements installed.")
+    parser.add_argument("--skip-memory", action="store_true", help="Skip the tracemalloc pass.")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    selected = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = [target for target in selected if target not in targets]
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(unknown)}")
+
+    results = []
+    with MockOllamaServer(latency=args.latency, reply=args.reply, token_rate=args.token_rate, tool_calls=CALCULATOR_CALL) as server:
+        for target in selected:
+            results.append(run_target(target, server, args))
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
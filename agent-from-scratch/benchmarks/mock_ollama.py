@@ -0,0 +1,260 @@
+"""A tiny asyncio HTTP server that answers chat requests with canned replies.
+
+It exists so the agents and the gateway can be benchmarked without a model.
+It speaks both the Ollama ``/api/chat`` protocol and the OpenAI-compatible
+``/v1/chat/completions`` one, streaming or not. Every reply takes ``latency``
+seconds before the first token plus one ``1 / token_rate`` step per token, and
+costs nothing else, which makes client-side overhead (threads, connection
+handling, the tool loop) visible.
+
+When ``tool_calls`` is set, a request that offers tools is answered with those
+tool calls, and the follow-up request carrying the tool results gets the text
+reply, so every user turn goes through exactly one round of the tool loop.
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+class MockOllamaServer:
+    """Serve canned Ollama and OpenAI-compatible chat responses from a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, reply="This is a mock reply.", token_rate=None, tool_calls=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.reply = reply
+        self.token_rate = token_rate
+        self.tool_calls = tool_calls
+        self.requests = 0
+        self.streams_completed = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._writers = set()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving and return the base URL"""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _serve(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_connection, self.host, self.port, backlog=4096)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            # Close connections clients left open so their handlers see EOF and return
+            for writer in self._writers:
+                writer.transport.abort()
+            tasks = asyncio.all_tasks(self._loop)
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    async def _handle_connection(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            # HTTP/1.1 keep-alive: serve requests until the client closes the connection
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                request = json.loads(body) if body else {}
+                if method == "POST" and request.get("stream"):
+                    if path == "/api/chat":
+                        await self._write_stream(writer, self.stream_chat(request), "application/x-ndjson", self._ndjson)
+                        continue
+                    if path == "/v1/chat/completions":
+                        await self._write_stream(writer, self.stream_openai(request), "text/event-stream", self._sse, b"data: [DONE]\n\n")
+                        continue
+                status, payload = await self.handle(method, path, request)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    def _ndjson(chunk):
+        return json.dumps(chunk).encode() + b"\n"
+
+    @staticmethod
+    def _sse(chunk):
+        return b"data: " + json.dumps(chunk).encode() + b"\n\n"
+
+    async def _write_stream(self, writer, chunks, content_type, encode, trailer=b""):
+        # Each chunk is written as it is produced, with chunked transfer encoding
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nTransfer-Encoding: chunked\r\n\r\n".encode())
+        async for chunk in chunks:
+            data = encode(chunk)
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            await writer.drain()
+        if trailer:
+            writer.write(f"{len(trailer):x}\r\n".encode() + trailer + b"\r\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def _wants_tools(self, request):
+        # Answer with the scripted tool calls unless the tools already ran this turn
+        messages = request.get("messages") or [{}]
+        return bool(self.tool_calls and request.get("tools") and messages[-1].get("role") != "tool")
+
+    @staticmethod
+    def _prompt_tokens(request):
+        return sum(len(str(message.get("content") or "")) // 4 + 4 for message in request.get("messages") or [])
+
+    async def _tokens(self):
+        """Yield the reply one word (token) at a time, after ``latency`` seconds"""
+        words = self.reply.split(" ")
+        if self.token_rate is None:
+            # Without a token rate the latency is spread over the words
+            delays = [self.latency / len(words)] * len(words)
+        else:
+            delays = [self.latency] + [1 / self.token_rate] * (len(words) - 1)
+        for i, word in enumerate(words):
+            await asyncio.sleep(delays[i])
+            yield word if i == 0 else " " + word
+
+    def _generation_time(self):
+        if self.token_rate is None:
+            return self.latency
+        return self.latency + (len(self.reply.split(" ")) - 1) / self.token_rate
+
+    def _ollama_message(self, request, content):
+        if self._wants_tools(request):
+            return {"role": "assistant", "content": "", "tool_calls": self.tool_calls}
+        return {"role": "assistant", "content": content}
+
+    def _openai_tool_calls(self):
+        return [
+            {
+                "index": i,
+                "id": f"call_{i}",
+                "type": "function",
+                "function": {"name": call["function"]["name"], "arguments": json.dumps(call["function"]["arguments"])},
+            }
+            for i, call in enumerate(self.tool_calls)
+        ]
+
+    async def stream_chat(self, request):
+        """Yield an Ollama streaming response"""
+        self.requests += 1
+        model = request.get("model", "")
+        completion_tokens = 0
+        if self._wants_tools(request):
+            await asyncio.sleep(self.latency)
+            yield {
+                "model": model,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "message": self._ollama_message(request, ""),
+                "done": False,
+            }
+        else:
+            async for token in self._tokens():
+                completion_tokens += 1
+                yield {
+                    "model": model,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "message": {"role": "assistant", "content": token},
+                    "done": False,
+                }
+        yield {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": self._prompt_tokens(request),
+            "eval_count": completion_tokens,
+        }
+        self.streams_completed += 1
+
+    async def stream_openai(self, request):
+        """Yield OpenAI chat.completion.chunk objects"""
+        self.requests += 1
+        base = {"id": f"chatcmpl-{self.requests}", "object": "chat.completion.chunk", "created": int(time.time()), "model": request.get("model", "")}
+        if self._wants_tools(request):
+            await asyncio.sleep(self.latency)
+            yield {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "tool_calls": self._openai_tool_calls()}, "finish_reason": None}]}
+            finish_reason = "tool_calls"
+        else:
+            async for token in self._tokens():
+                yield {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": token}, "finish_reason": None}]}
+            finish_reason = "stop"
+        yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+        self.streams_completed += 1
+
+    async def handle(self, method, path, request):
+        """Return (status line, JSON payload) for one request"""
+        if method == "POST" and path == "/api/chat":
+            self.requests += 1
+            await asyncio.sleep(self._generation_time())
+            message = self._ollama_message(request, self.reply)
+            return "200 OK", {
+                "model": request.get("model", ""),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "message": message,
+                "done": True,
+                "done_reason": "stop",
+                "prompt_eval_count": self._prompt_tokens(request),
+                "eval_count": len(message["content"].split()),
+            }
+        if method == "POST" and path == "/v1/chat/completions":
+            self.requests += 1
+            await asyncio.sleep(self._generation_time())
+            if self._wants_tools(request):
+                message, finish_reason = {"role": "assistant", "content": None, "tool_calls": self._openai_tool_calls()}, "tool_calls"
+            else:
+                message, finish_reason = {"role": "assistant", "content": self.reply}, "stop"
+            prompt_tokens = self._prompt_tokens(request)
+            completion_tokens = len((message["content"] or "").split())
+            return "200 OK", {
+                "id": f"chatcmpl-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", ""),
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+            }
+        return "404 Not Found", {"error": f"{method} {path} not found"}
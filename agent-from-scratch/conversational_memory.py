@@ -1,39 +1,90 @@
 import os
 import argparse
-from ollama import Client
+from memory import ConversationMemory, SlidingWindowMemory, SummarizingMemory, ollama_summarizer
+from session_store import SessionStore
 
 class Agent:
     """A simple AI agent that can answer questions"""
 
-    def __init__(self, model='granite4:tiny-h'):
-        self.client = Client()
+    def __init__(self, model='granite4:tiny-h', client=None, memory=None, keep_alive="30m"):
+        if client is None:
+            from ollama import Client
+            client = Client()
+        self.client = client
         self.model = model
+        # Keep the model loaded across the pauses between a user's messages
+        self.keep_alive = keep_alive
+        # The memory manager owns the message list and keeps it within its token budget
+        self.memory = memory or ConversationMemory()
+        self.messages = self.memory.messages
         # Initialize with system message
-        self.messages = [{'role': 'system', 'content': "You are a helpful assistant that breaks down problems into steps and solves them systematically."}]
+        self.memory.append({'role': 'system', 'content': "You are a helpful assistant that breaks down problems into steps and solves them systematically."})
 
     def chat(self, message):
         """Process a user message and return a response"""
 
         # Store user input in memory
-        self.messages.append({"role": "user", "content": message})
+        self.memory.append({"role": "user", "content": message})
 
         response = self.client.chat(
             model=self.model,
-            messages=self.messages
+            messages=self.messages,
+            keep_alive=self.keep_alive,
         )
 
         assistant_response = response['message']['content']
         # Store assistant's response in memory
-        self.messages.append({"role": "assistant", "content": assistant_response})
+        self.memory.append({"role": "assistant", "content": assistant_response})
 
         return assistant_response
 
+    def warm_up(self):
+        """Load the model and evaluate the system prompt before the first message"""
+        self.client.chat(model=self.model, messages=self.messages[:1], keep_alive=self.keep_alive, options={"num_predict": 1})
+
+    def stream_chat(self, message):
+        """Process a user message, yielding the response text as it is generated"""
+
+        self.memory.append({"role": "user", "content": message})
+
+        content = []
+        for chunk in self.client.chat(
+            model=self.model,
+            messages=self.messages,
+            keep_alive=self.keep_alive,
+            stream=True,
+        ):
+            delta = chunk['message']['content']
+            if delta:
+                content.append(delta)
+                yield delta
+
+        # Only store the response once it is complete
+        self.memory.append({"role": "assistant", "content": ''.join(content)})
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="A simple AI agent using Ollama with conversational memory.")
     parser.add_argument("--model", type=str, default="granite4:tiny-h", help="The Ollama model to use.")
+    parser.add_argument("--stream", action="store_true", help="Print responses as they are generated.")
+    parser.add_argument("--max-context-tokens", type=int, default=None, help="Token budget for the conversation history sent to the model.")
+    parser.add_argument("--summarize", action="store_true", help="Summarize turns evicted from the context window instead of dropping them.")
+    parser.add_argument("--keep-alive", type=str, default="30m", help="How long Ollama keeps the model loaded between messages, e.g. 30m, 1h, or --keep-alive=-1m to keep it loaded (the = is needed for a negative value).")
+    parser.add_argument("--session", type=str, default=None, help="Save the conversation under this name and resume it on the next run.")
+    parser.add_argument("--db", type=str, default="sessions.db", help="SQLite file that stores the sessions.")
     args = parser.parse_args()
 
-    agent = Agent(model=args.model)
+    from ollama import Client
+    client = Client()
+    memory = None
+    if args.max_context_tokens and args.summarize:
+        memory = SummarizingMemory(ollama_summarizer(client, args.model), max_tokens=args.max_context_tokens)
+    elif args.max_context_tokens:
+        memory = SlidingWindowMemory(max_tokens=args.max_context_tokens)
+
+    agent = Agent(model=args.model, client=client, memory=memory, keep_alive=args.keep_alive)
+    if args.session:
+        SessionStore(args.db).attach(args.session, agent.memory)
+    agent.warm_up()
     print("Agent is ready. Type 'exit' or 'quit' to end the conversation.")
 
     while True:
@@ -41,8 +92,14 @@ if __name__ == "__main__":
             user_message = input("You: ")
             if user_message.lower() in ["exit", "quit"]:
                 break
-            assistant_message = agent.chat(user_message)
-            print(f"Agent: {assistant_message}")
+            if args.stream:
+                print("Agent: ", end="", flush=True)
+                for delta in agent.stream_chat(user_message):
+                    print(delta, end="", flush=True)
+                print()
+            else:
+                assistant_message = agent.chat(user_message)
+                print(f"Agent: {assistant_message}")
         except KeyboardInterrupt:
             print("\nExiting...")
             break
@@ -0,0 +1,214 @@
+def normalize_message(message):
+    """
+    Plain-dict copy of a chat message (dict or ollama Message) with a fixed key
+    order and no empty fields, so earlier turns serialize to the same bytes on
+    every call and the backend can reuse its cached prompt prefix.
+    """
+    if hasattr(message, "model_dump"):
+        message = message.model_dump(exclude_none=True)
+    normalized = {"role": message["role"], "content": message.get("content") or ""}
+    for key in ("tool_calls", "tool_name", "images", "thinking"):
+        if message.get(key):
+            normalized[key] = message[key]
+    if "tool_calls" in normalized:
+        # Streamed turns are assembled as dicts that still hold ollama ToolCall objects
+        normalized["tool_calls"] = [
+            call.model_dump(exclude_none=True) if hasattr(call, "model_dump") else call
+            for call in normalized["tool_calls"]
+        ]
+    return normalized
+
+class ConversationMemory:
+    """Unbounded conversation history with an incrementally maintained token estimate.
+
+    Subclasses decide what to do when the history grows past ``max_tokens``.
+    The ``messages`` list is only ever modified in place, so agents can keep
+    a reference to it.
+    """
+
+    def __init__(self, max_tokens=None):
+        self.max_tokens = max_tokens
+        self.messages = []
+        self.token_count = 0
+        self.tokens_evicted = 0
+        self.messages_evicted = 0
+        self._token_counts = []
+        # Optional SessionStore that receives every appended message
+        self.store = None
+        self.session_id = None
+
+    @staticmethod
+    def estimate_tokens(message):
+        """
+        Approximate the number of tokens a message costs in the prompt.
+
+        Args:
+            message (dict): A chat message
+        Returns:
+            int: About one token per four characters, plus a small per-message overhead
+        """
+        text = message.get('content') or ''
+        if message.get('tool_calls'):
+            text += str(message['tool_calls'])
+        return len(text) // 4 + 4
+
+    def append(self, message):
+        message = normalize_message(message)
+        tokens = self.estimate_tokens(message)
+        self.messages.append(message)
+        self._token_counts.append(tokens)
+        self.token_count += tokens
+        if self.store is not None:
+            self.store.append(self.session_id, message, tokens)
+        if self.max_tokens is not None and self.token_count > self.max_tokens:
+            self.enforce_budget()
+
+    def persist_to(self, store, session_id):
+        """Write every message appended from now on to a SessionStore"""
+        self.store = store
+        self.session_id = session_id
+
+    def restore(self, messages):
+        """Replace the history with messages loaded from a store, without writing them back"""
+        del self.messages[:]
+        self._token_counts = [self.estimate_tokens(message) for message in messages]
+        self.messages.extend(messages)
+        self.token_count = sum(self._token_counts)
+        if self.max_tokens is not None and self.token_count > self.max_tokens:
+            self.enforce_budget()
+
+    def enforce_budget(self):
+        """Bring the history back under budget. The base class keeps everything."""
+
+    def stats(self):
+        return {
+            "messages": len(self.messages),
+            "tokens": self.token_count,
+            "max_tokens": self.max_tokens,
+            "messages_evicted": self.messages_evicted,
+            "tokens_evicted": self.tokens_evicted,
+            # Tokens no longer resent on every model call
+            "tokens_saved_per_call": self.tokens_evicted,
+        }
+
+    def _pinned_count(self):
+        # Leading system messages (the system prompt and any summary) are never evicted
+        count = 0
+        while count < len(self.messages) and self.messages[count]['role'] == 'system':
+            count += 1
+        return count
+
+    def _remove(self, start, end):
+        evicted = self.messages[start:end]
+        tokens = sum(self._token_counts[start:end])
+        del self.messages[start:end]
+        del self._token_counts[start:end]
+        self.token_count -= tokens
+        return evicted, tokens
+
+class SlidingWindowMemory(ConversationMemory):
+    """Drop the oldest turns once the history exceeds the token budget.
+
+    A turn is a user message together with everything that follows it up to the
+    next user message, so assistant tool calls are always evicted along with
+    their tool results. The system prompt and the current turn are always kept.
+    """
+
+    def __init__(self, max_tokens=4096, target_ratio=0.75):
+        super().__init__(max_tokens=max_tokens)
+        # Trim below the budget so eviction (and summarization) happens in batches
+        self.target_tokens = int(max_tokens * target_ratio)
+
+    def _oldest_turn(self):
+        start = self._pinned_count()
+        user_indexes = [i for i in range(start, len(self.messages)) if self.messages[i]['role'] == 'user']
+        if len(user_indexes) < 2:
+            return None
+        return start, user_indexes[1]
+
+    def enforce_budget(self):
+        evicted = []
+        evicted_tokens = 0
+        while self.token_count > self.target_tokens:
+            turn = self._oldest_turn()
+            if turn is None:
+                break
+            messages, tokens = self._remove(*turn)
+            evicted.extend(messages)
+            evicted_tokens += tokens
+
+        if evicted:
+            self.messages_evicted += len(evicted)
+            self.tokens_evicted += evicted_tokens
+            self.on_evicted(evicted)
+
+    def on_evicted(self, messages):
+        """Called with the messages removed by one round of eviction"""
+
+class SummarizingMemory(SlidingWindowMemory):
+    """Sliding window that folds evicted turns into a rolling summary.
+
+    The summary is kept as a system message right after the system prompt and
+    is rewritten every time more turns are evicted.
+    """
+
+    SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+    def __init__(self, summarizer, max_tokens=4096, target_ratio=0.75):
+        super().__init__(max_tokens=max_tokens, target_ratio=target_ratio)
+        self.summarizer = summarizer
+        self.summary = ""
+        self.summary_tokens = 0
+
+    def on_evicted(self, messages):
+        self.summary = self.summarizer(self.summary, messages)
+        summary_message = {'role': 'system', 'content': self.SUMMARY_PREFIX + self.summary}
+
+        # Replace the previous summary, which sits right after the system prompt
+        index = 1 if self.messages and self.messages[0]['role'] == 'system' else 0
+        if index < len(self.messages) and self.messages[index]['content'].startswith(self.SUMMARY_PREFIX):
+            self._remove(index, index + 1)
+        tokens = self.estimate_tokens(summary_message)
+        self.messages.insert(index, summary_message)
+        self._token_counts.insert(index, tokens)
+        self.token_count += tokens
+        self.summary_tokens = tokens
+
+    def restore(self, messages):
+        # Pick the rolling summary back up from the restored history, or start without one
+        self.summary, self.summary_tokens = "", 0
+        for message in messages:
+            if message['role'] == 'system' and (message.get('content') or '').startswith(self.SUMMARY_PREFIX):
+                self.summary = message['content'][len(self.SUMMARY_PREFIX):]
+                self.summary_tokens = self.estimate_tokens(message)
+        super().restore(messages)
+
+    def stats(self):
+        stats = super().stats()
+        stats["summary_tokens"] = self.summary_tokens
+        stats["tokens_saved_per_call"] = self.tokens_evicted - self.summary_tokens
+        return stats
+
+def ollama_summarizer(client, model):
+    """
+    Build a summarizer for SummarizingMemory that asks an Ollama model to
+    update the running summary.
+
+    Args:
+        client: A blocking ollama Client
+        model (str): The model to summarize with
+    Returns:
+        callable: summarizer(previous_summary, evicted_messages) -> str
+    """
+    def summarize(previous_summary, messages):
+        transcript = "\n".join(f"{m['role']}: {m.get('content') or ''}" for m in messages)
+        response = client.chat(
+            model=model,
+            messages=[
+                {'role': 'system', 'content': "You maintain a concise running summary of a conversation. Keep facts, numbers, names and decisions; drop small talk."},
+                {'role': 'user', 'content': f"Current summary:\n{previous_summary or '(empty)'}\n\nNew messages:\n{transcript}\n\nReturn the updated summary only."},
+            ],
+        )
+        return response['message']['content']
+
+    return summarize
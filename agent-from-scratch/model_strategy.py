@@ -0,0 +1,246 @@
+"""Answer a model call with one of several models instead of a single fixed one.
+
+``Escalate`` asks a small, fast model first and only moves on to the next
+(larger) model when the answer cannot be used: the call failed, took longer
+than its latency budget, or came back with a tool call that names no known
+tool or with a tool call written out as text. ``Race`` sends the request to
+every model at once and takes the first usable answer. In both, the last model
+is the fallback: it has no budget and its answer is always accepted.
+
+    strategy = Escalate(["granite4:tiny-h", "qwen3:8b"], budget=5)
+    agent = Agent(model="granite4:tiny-h", tools=[CalculatorTool()], strategy=strategy)
+
+Ollama must be allowed to keep all the models loaded at once
+(OLLAMA_MAX_LOADED_MODELS), or every switch between them is a cold load.
+"""
+import re
+import time
+from abc import ABC, abstractmethod
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait
+from telemetry import log, span, record_model_response, MODEL_STRATEGY_OUTCOMES
+
+# A tool call the model wrote into its text instead of the tool_calls field
+_TEXT_TOOL_CALL = re.compile(r'^\s*(\{\s*"(name|function)"\s*:|<\|?tool_call\|?>)')
+
+def rejection(agent, message):
+    """
+    Why a model's message cannot be used as the agent's next step.
+
+    Returns:
+        str: The reason, or None if the message is usable
+    """
+    tool_calls = message.get("tool_calls")
+    if tool_calls:
+        # The same resolution the agent applies before running the tools
+        for tool_call in tool_calls:
+            if agent._resolve_tool_call(tool_call) is None:
+                return "unresolvable tool call"
+        return None
+    content = message.get("content") or ""
+    if not content.strip():
+        return "empty response"
+    if agent.tool_map and _TEXT_TOOL_CALL.match(content):
+        return "tool call in text"
+    return None
+
+class ModelStrategy(ABC):
+    """Base class: the candidate models in order of preference, the last one being the fallback"""
+
+    name = None
+
+    def __init__(self, models, budget=None, max_workers=32):
+        """
+        Args:
+            models (list): Model names, fastest first; the last is the fallback
+            budget (float): Seconds each model but the fallback gets to answer, or None
+            max_workers (int): Threads for calls that run under a budget or in parallel (sync agents only)
+        """
+        if len(models) < 2:
+            raise ValueError(f"{type(self).__name__} needs at least two models, got {models!r}")
+        self.models = list(models)
+        self.budget = budget
+        self.max_workers = max_workers
+        self._pool = None
+
+    @property
+    def fallback(self):
+        return self.models[-1]
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="model")
+        return self._pool
+
+    def _outcome(self, model, outcome, **fields):
+        MODEL_STRATEGY_OUTCOMES.labels(self.name, model, outcome).inc()
+        if outcome != "accepted":
+            log(logging.DEBUG, "model response not used", strategy=self.name, model=model, outcome=outcome, **fields)
+
+    def _judge(self, agent, model, response):
+        """True if the response is to be returned: it is usable, or it is the fallback's"""
+        reason = rejection(agent, response['message'])
+        if reason is None or model == self.fallback:
+            self._outcome(model, "accepted")
+            return True
+        self._outcome(model, "rejected", reason=reason)
+        return False
+
+    @staticmethod
+    def _timed_call(agent, request, model):
+        with span("agent.model_call", model=model):
+            start = time.perf_counter()
+            response = agent.client.chat(**dict(request, model=model))
+            return response, record_model_response(model, response, time.perf_counter() - start)
+
+    @staticmethod
+    async def _atimed_call(agent, request, model):
+        with span("agent.model_call", model=model):
+            start = time.perf_counter()
+            response = await agent.client.chat(**dict(request, model=model))
+            return response, record_model_response(model, response, time.perf_counter() - start)
+
+    @abstractmethod
+    def call(self, agent, request):
+        """
+        Answer a chat request built by ``agent._chat_request()``.
+
+        Returns:
+            tuple: (model, response, timings) for the answer that was used
+        """
+
+    @abstractmethod
+    async def acall(self, agent, request):
+        """Async version of call(), for agents with an AsyncClient"""
+
+    def shutdown(self):
+        """Release the worker threads. Calls that lost a race are not waited for."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+class Escalate(ModelStrategy):
+    """Try the models one at a time, moving on only when an answer cannot be used"""
+
+    name = "escalate"
+
+    def call(self, agent, request):
+        for model in self.models:
+            budget = None if model == self.fallback else self.budget
+            try:
+                if budget is None:
+                    response, timings = self._timed_call(agent, request, model)
+                else:
+                    # A sync call cannot be interrupted; once over budget it finishes in the background
+                    response, timings = self._get_pool().submit(self._timed_call, agent, request, model).result(timeout=budget)
+            except Exception as e:
+                if model == self.fallback:
+                    raise
+                self._outcome(model, "timeout" if isinstance(e, FutureTimeoutError) else "error", error=str(e))
+                continue
+            if self._judge(agent, model, response):
+                return model, response, timings
+
+    async def acall(self, agent, request):
+        for model in self.models:
+            budget = None if model == self.fallback else self.budget
+            try:
+                response, timings = await asyncio.wait_for(self._atimed_call(agent, request, model), budget)
+            except Exception as e:
+                if model == self.fallback:
+                    raise
+                self._outcome(model, "timeout" if isinstance(e, asyncio.TimeoutError) else "error", error=str(e))
+                continue
+            if self._judge(agent, model, response):
+                return model, response, timings
+
+class Race(ModelStrategy):
+    """Ask every model at once and use the first usable answer, or else the fallback's.
+
+    Models other than the fallback that have not answered within the budget are
+    no longer waited for. With an AsyncClient the losing requests are cancelled,
+    which makes Ollama stop generating; with a sync client they run to completion
+    in the background and their answers are discarded.
+    """
+
+    name = "race"
+
+    def call(self, agent, request):
+        started = time.monotonic()
+        pending = {self._get_pool().submit(self._timed_call, agent, request, model): model for model in self.models}
+        candidates = dict(pending)
+        failure = None
+        while pending:
+            timeout = None
+            if self.budget is not None and any(model != self.fallback for model in pending.values()):
+                timeout = max(0, started + self.budget - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Over budget: from now on only the fallback counts
+                for future, model in list(pending.items()):
+                    if model != self.fallback:
+                        self._outcome(model, "timeout")
+                        del pending[future]
+                continue
+            for future in done:
+                model = pending.pop(future)
+                try:
+                    response, timings = future.result()
+                except Exception as e:
+                    self._outcome(model, "error", error=str(e))
+                    failure = failure or e
+                    continue
+                if self._judge(agent, model, response):
+                    for other, other_model in pending.items():
+                        other.cancel()
+                        self._outcome(other_model, "cancelled")
+                    return model, response, timings
+        raise failure or RuntimeError(f"No model answered: {', '.join(candidates.values())}")
+
+    async def acall(self, agent, request):
+        started = time.monotonic()
+        pending = {asyncio.ensure_future(self._atimed_call(agent, request, model)): model for model in self.models}
+        failure = None
+        try:
+            while pending:
+                timeout = None
+                if self.budget is not None and any(model != self.fallback for model in pending.values()):
+                    timeout = max(0, started + self.budget - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    for task, model in list(pending.items()):
+                        if model != self.fallback:
+                            task.cancel()
+                            self._outcome(model, "timeout")
+                            del pending[task]
+                    continue
+                for task in done:
+                    model = pending.pop(task)
+                    try:
+                        response, timings = task.result()
+                    except Exception as e:
+                        self._outcome(model, "error", error=str(e))
+                        failure = failure or e
+                        continue
+                    if self._judge(agent, model, response):
+                        return model, response, timings
+            raise failure or RuntimeError(f"No model answered: {', '.join(self.models)}")
+        finally:
+            for task, model in pending.items():
+                task.cancel()
+                self._outcome(model, "cancelled")
+
+STRATEGIES = {strategy.name: strategy for strategy in (Escalate, Race)}
+
+def add_arguments(parser):
+    """Command line options for choosing a strategy, shared by the agent scripts"""
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default=None, help="Answer each model call with several models (see --models) instead of --model alone.")
+    parser.add_argument("--models", type=str, default="granite4:tiny-h,qwen3:8b", help="Comma-separated models for --strategy, fastest first; the last is the fallback.")
+    parser.add_argument("--latency-budget", type=float, default=None, help="Seconds each model but the fallback gets to answer a call.")
+
+def from_args(args):
+    """The strategy selected on the command line, or None to use the single --model"""
+    if not args.strategy:
+        return None
+    models = [model.strip() for model in args.models.split(",") if model.strip()]
+    return STRATEGIES[args.strategy](models, budget=args.latency_budget)
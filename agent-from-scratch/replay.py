@@ -0,0 +1,255 @@
+"""Record a session's model responses and tool results, and play them back.
+
+A recording is a JSONL file (gzip-compressed when the name ends in ``.gz``)
+with one line per distinct model request or tool call, keyed on a hash of the
+request. Playing it back serves every model call from that index instead of
+Ollama, so a conversation recorded once replays in milliseconds and always
+takes the same path through the tool loop. That makes tests of the loop fast
+and reproducible, and profiles of it free of model latency.
+
+    recorder = Recorder("session.jsonl.gz")
+    agent = Agent(client=recorder.wrap_client(Client()), tool_cache=recorder.wrap_tools(default_cache), ...)
+    ...
+    recorder.close()
+
+    playback = Replay("session.jsonl.gz")
+    agent = Agent(client=playback.client(), tool_cache=playback.tool_cache(), ...)
+"""
+import gzip
+import hashlib
+import inspect
+import json
+import threading
+from tool_cache import cache_key
+
+# Request fields that do not change what the model answers
+_IGNORED_FIELDS = ("keep_alive",)
+
+class ReplayMiss(LookupError):
+    """Raised when a recording has no response for a request"""
+
+def _jsonable(value):
+    # Ollama responses and tools payloads are pydantic models
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _plain(value):
+    return json.loads(json.dumps(value, default=_jsonable))
+
+def request_key(request):
+    """Hash of a chat request (the keyword arguments of client.chat), with its fields serialized canonically"""
+    fields = {name: value for name, value in request.items() if name not in _IGNORED_FIELDS and value is not None}
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_jsonable)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+def _open(path, mode):
+    return gzip.open(path, mode + "t", encoding="utf-8") if path.endswith(".gz") else open(path, mode, encoding="utf-8")
+
+class Recorder:
+    """Append model responses and tool results to a recording file.
+
+    Each key is written once, so recording many sessions that share requests
+    (the warm-up call, a common first question) stays compact.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._file = _open(path, "a")
+
+    def write(self, kind, key, **fields):
+        with self._lock:
+            if (kind, key) in self._seen:
+                return
+            self._seen.add((kind, key))
+            self._file.write(json.dumps({"type": kind, "key": key, **fields}, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+    def wrap_client(self, client):
+        """A client that forwards to ``client`` and records what it answers (sync or async, like the client)"""
+        if inspect.iscoroutinefunction(client.chat):
+            return AsyncRecordingClient(client, self)
+        return RecordingClient(client, self)
+
+    def wrap_tools(self, cache=None):
+        """A tool cache for Agent(tool_cache=...) that records tool results, looking them up in ``cache`` first"""
+        return RecordingToolCache(self, cache)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+class RecordingClient:
+    def __init__(self, client, recorder):
+        self.client = client
+        self.recorder = recorder
+
+    def chat(self, **request):
+        key = request_key(request)
+        response = self.client.chat(**request)
+        if request.get("stream"):
+            return self._record_stream(key, response)
+        self.recorder.write("model", key, response=_plain(response))
+        return response
+
+    def _record_stream(self, key, chunks):
+        recorded = []
+        for chunk in chunks:
+            recorded.append(_plain(chunk))
+            yield chunk
+        self.recorder.write("model", key, chunks=recorded)
+
+class AsyncRecordingClient(RecordingClient):
+    async def chat(self, **request):
+        key = request_key(request)
+        response = await self.client.chat(**request)
+        if request.get("stream"):
+            return self._record_stream(key, response)
+        self.recorder.write("model", key, response=_plain(response))
+        return response
+
+    async def _record_stream(self, key, chunks):
+        recorded = []
+        async for chunk in chunks:
+            recorded.append(_plain(chunk))
+            yield chunk
+        self.recorder.write("model", key, chunks=recorded)
+
+class RecordingToolCache:
+    """Runs tools like ToolCache.call/acall (through ``cache`` when given) and records each result"""
+
+    def __init__(self, recorder, cache=None):
+        self.recorder = recorder
+        self.cache = cache
+
+    def call(self, tool_name, tool, tool_args):
+        result = self.cache.call(tool_name, tool, tool_args) if self.cache is not None else tool.execute(**tool_args)
+        self.recorder.write("tool", cache_key(tool_name, tool_args), tool=tool_name, result=_plain(result))
+        return result
+
+    async def acall(self, tool_name, tool, tool_args):
+        result = await self.cache.acall(tool_name, tool, tool_args) if self.cache is not None else await tool.execute(**tool_args)
+        self.recorder.write("tool", cache_key(tool_name, tool_args), tool=tool_name, result=_plain(result))
+        return result
+
+class Replay:
+    """An index of a recording, loaded into memory"""
+
+    def __init__(self, path):
+        self.path = path
+        self.responses = {}
+        self.tool_results = {}
+        self.hits = 0
+        self.misses = 0
+        with _open(path, "r") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["type"] == "model":
+                    # Recordings are appended to, so the first answer for a key wins
+                    self.responses.setdefault(record["key"], record.get("chunks", record.get("response")))
+                else:
+                    self.tool_results.setdefault(record["key"], record["result"])
+
+    def response(self, request):
+        """The recorded response for a request: a dict, or a list of chunks for a streamed request"""
+        key = request_key(request)
+        response = self.responses.get(key)
+        if response is None:
+            self.misses += 1
+            raise ReplayMiss(f"{self.path} has no response for this {request.get('model')} request (key {key}); record the session again")
+        self.hits += 1
+        return response
+
+    def client(self, asynchronous=False, fallback=None):
+        """
+        A client that answers from the recording.
+
+        Args:
+            asynchronous (bool): Return an AsyncClient lookalike, for AsyncAgent
+            fallback: A real client to call for requests that were not recorded, instead of raising ReplayMiss
+        """
+        return (AsyncReplayClient if asynchronous else ReplayClient)(self, fallback)
+
+    def tool_cache(self, strict=False):
+        """
+        A tool cache for Agent(tool_cache=...) that returns recorded tool results.
+        Tool calls that were not recorded run live, or raise ReplayMiss when ``strict``.
+        """
+        return ReplayToolCache(self, strict)
+
+    def stats(self):
+        return {"responses": len(self.responses), "tool_results": len(self.tool_results), "hits": self.hits, "misses": self.misses}
+
+class ReplayClient:
+    def __init__(self, replay, fallback=None):
+        self.replay = replay
+        self.fallback = fallback
+
+    def chat(self, **request):
+        try:
+            response = self.replay.response(request)
+        except ReplayMiss:
+            if self.fallback is None:
+                raise
+            return self.fallback.chat(**request)
+        return iter(response) if request.get("stream") else response
+
+class AsyncReplayClient(ReplayClient):
+    async def chat(self, **request):
+        try:
+            response = self.replay.response(request)
+        except ReplayMiss:
+            if self.fallback is None:
+                raise
+            return await self.fallback.chat(**request)
+        return self._stream(response) if request.get("stream") else response
+
+    @staticmethod
+    async def _stream(chunks):
+        for chunk in chunks:
+            yield chunk
+
+class ReplayToolCache:
+    def __init__(self, replay, strict=False):
+        self.replay = replay
+        self.strict = strict
+
+    def _recorded(self, tool_name, tool_args):
+        result = self.replay.tool_results.get(cache_key(tool_name, tool_args))
+        if result is None and self.strict:
+            raise ReplayMiss(f"{self.replay.path} has no result for {tool_name}({tool_args})")
+        return result
+
+    def call(self, tool_name, tool, tool_args):
+        result = self._recorded(tool_name, tool_args)
+        return tool.execute(**tool_args) if result is None else result
+
+    async def acall(self, tool_name, tool, tool_args):
+        result = self._recorded(tool_name, tool_args)
+        return await tool.execute(**tool_args) if result is None else result
+
+def add_arguments(parser):
+    """Command line options for recording or replaying, shared by the agent scripts"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", type=str, default=None, help="Record model responses and tool results to this file (.jsonl or .jsonl.gz).")
+    group.add_argument("--replay", type=str, default=None, help="Answer model calls and tool calls from a file written by --record, without calling the model.")
+
+def from_args(args, make_client, tool_cache, asynchronous=False):
+    """
+    Apply --record or --replay to an agent's client and tool cache.
+
+    Args:
+        make_client (callable): Returns the client the agent would use; not called when replaying
+        tool_cache: The ToolCache the agent would use, or None for no caching
+        asynchronous (bool): The agent is an AsyncAgent
+    Returns:
+        tuple: (client, tool_cache, recorder), where recorder is the Recorder to close or None
+    """
+    if args.replay:
+        playback = Replay(args.replay)
+        return playback.client(asynchronous=asynchronous), playback.tool_cache(), None
+    if args.record:
+        recorder = Recorder(args.record)
+        return recorder.wrap_client(make_client()), recorder.wrap_tools(tool_cache), recorder
+    return make_client(), tool_cache, None
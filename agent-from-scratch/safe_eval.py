@@ -0,0 +1,292 @@
+"""A safe arithmetic evaluator for the calculator tool.
+
+Expressions are parsed once, checked against a whitelist of AST nodes and
+compiled into a tree of Python closures. Compiled expressions are kept in an
+LRU cache, so repeated calculations skip parsing entirely. Evaluation is
+guarded against huge exponents and bounded in time, so a model-supplied
+``9**9**9`` fails fast instead of stalling the worker or the event loop. The
+time limit is only checked between operations, so every whitelisted function
+also has its arguments checked (``round(5, -10**8)`` is rejected) and integer
+array arithmetic that would wrap around, or results that are not finite, raise
+ExpressionError.
+"""
+import ast
+import math
+import operator
+import time
+from contextlib import nullcontext
+from functools import lru_cache, reduce
+
+# NumPy is only needed for list-valued variables in evaluate_many(), so it is
+# imported there on first use instead of on every import of this module
+np = None
+
+def _load_numpy():
+    """Import NumPy if it is installed, returning the module or None"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+MAX_EXPRESSION_LENGTH = 1000
+# Integer results (of powers or any other operation) may not be larger than this many bits
+MAX_POWER_BITS = 10_000
+# round(x, ndigits) builds 10 ** abs(ndigits), and no float has more digits than this
+MAX_ROUND_DIGITS = 400
+# Elements of a NumPy integer array wrap around silently past this many bits
+MAX_ARRAY_INT_BITS = 63
+DEFAULT_TIME_LIMIT = 0.1
+
+class ExpressionError(ValueError):
+    """Raised for expressions that are invalid, not allowed or too expensive"""
+
+def _is_array(value):
+    return np is not None and isinstance(value, np.ndarray)
+
+def _max_abs(value):
+    """The largest absolute value of a number or of the elements of an array"""
+    if _is_array(value):
+        return abs(value).max().item() if value.size else 0
+    return abs(value)
+
+def _is_integer(value):
+    if _is_array(value):
+        return value.dtype.kind in "iu"
+    return isinstance(value, int)
+
+def _safe_pow(base, exponent):
+    if _is_array(base) or _is_array(exponent):
+        largest_base, largest_exponent = _max_abs(base), _max_abs(exponent)
+        if largest_base > 1 and largest_exponent * math.log2(largest_base) > MAX_POWER_BITS:
+            raise ExpressionError(f"Exponent too large: {largest_base} ** {largest_exponent}")
+    elif isinstance(base, (int, float)) and isinstance(exponent, (int, float)):
+        if abs(base) > 1 and abs(exponent) * math.log2(abs(base)) > MAX_POWER_BITS:
+            raise ExpressionError(f"Exponent too large: {base} ** {exponent}")
+    return operator.pow(base, exponent)
+
+def _check_array_overflow(op, left, right):
+    """Reject integer array arithmetic whose elements could wrap around"""
+    if not (_is_array(left) or _is_array(right)) or not (_is_integer(left) and _is_integer(right)):
+        return
+    left_bits, right_bits = int(_max_abs(left)).bit_length(), int(_max_abs(right)).bit_length()
+    if op in (operator.add, operator.sub):
+        bits = max(left_bits, right_bits) + 1
+    elif op is operator.mul:
+        bits = left_bits + right_bits
+    elif op is _safe_pow:
+        largest_base = _max_abs(left)
+        bits = _max_abs(right) * math.log2(largest_base) + 1 if largest_base > 1 else 1
+    else:
+        return
+    if bits > MAX_ARRAY_INT_BITS:
+        raise ExpressionError(f"Integer array result larger than {MAX_ARRAY_INT_BITS} bits")
+
+def _check_result(value):
+    # Complex numbers, huge integers and inf/nan cannot be sent back to the model as JSON
+    if _is_array(value):
+        if value.dtype.kind not in "iuf":
+            raise ExpressionError(f"Result is not a real number array: {value.dtype}")
+        if value.dtype.kind == "f" and not np.isfinite(value).all():
+            raise ExpressionError("Result is not a finite number")
+        return value
+    if isinstance(value, complex):
+        raise ExpressionError(f"Result is a complex number: {value}")
+    if isinstance(value, int) and value.bit_length() > MAX_POWER_BITS:
+        raise ExpressionError(f"Result larger than {MAX_POWER_BITS} bits")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ExpressionError(f"Result is not a finite number: {value}")
+    return value
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _safe_pow,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+# name: (function, minimum arguments, maximum arguments or None for any number)
+_FUNCTIONS = {
+    "abs": (abs, 1, 1),
+    "round": (round, 1, 2),
+    "min": (min, 2, None),
+    "max": (max, 2, None),
+    "sqrt": (math.sqrt, 1, 1),
+    "exp": (math.exp, 1, 1),
+    "log": (math.log, 1, 2),
+    "log10": (math.log10, 1, 1),
+    "sin": (math.sin, 1, 1),
+    "cos": (math.cos, 1, 1),
+    "tan": (math.tan, 1, 1),
+    "floor": (math.floor, 1, 1),
+    "ceil": (math.ceil, 1, 1),
+}
+
+# Element-wise NumPy equivalents used when an argument is an array
+_NUMPY_FUNCTIONS = {"min": "minimum", "max": "maximum"}
+
+def _check_arguments(name, args):
+    """Reject arguments a whitelisted function could spend unbounded time on"""
+    for arg in args:
+        if isinstance(arg, bool) or not (isinstance(arg, (int, float)) or _is_array(arg)):
+            raise ExpressionError(f"{name}() takes numbers, not {type(arg).__name__}")
+    if name == "round" and len(args) == 2:
+        ndigits = args[1]
+        if not isinstance(ndigits, int):
+            raise ExpressionError("round() takes a whole number of digits")
+        if abs(ndigits) > MAX_ROUND_DIGITS:
+            raise ExpressionError(f"round() takes at most {MAX_ROUND_DIGITS} digits")
+
+def _call(name, args):
+    _check_arguments(name, args)
+    if any(_is_array(arg) for arg in args):
+        if name == "log" and len(args) == 2:
+            # The second argument of np.log() is its output array, not the base
+            return np.log(args[0]) / np.log(args[1])
+        function = getattr(np, _NUMPY_FUNCTIONS.get(name, name))
+        if name in _NUMPY_FUNCTIONS:
+            return reduce(function, args)
+        return function(*args)
+    return _FUNCTIONS[name][0](*args)
+
+class _Context:
+    __slots__ = ("variables", "deadline")
+
+    def __init__(self, variables, time_limit):
+        self.variables = variables
+        self.deadline = time.monotonic() + time_limit if time_limit else None
+
+    def check(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ExpressionError("Expression took too long to evaluate")
+
+def _compile_node(node):
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"Unsupported constant: {node.value!r}")
+        value = node.value
+        return lambda ctx: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in _CONSTANTS:
+            value = _CONSTANTS[name]
+            return lambda ctx: value
+
+        def variable(ctx):
+            try:
+                return ctx.variables[name]
+            except KeyError:
+                raise ExpressionError(f"Unknown name: {name}") from None
+        return variable
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        op = _BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+
+        def binary(ctx):
+            ctx.check()
+            left_value, right_value = left(ctx), right(ctx)
+            _check_array_overflow(op, left_value, right_value)
+            return _check_result(op(left_value, right_value))
+        return binary
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        op = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda ctx: op(operand(ctx))
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+            raise ExpressionError(f"Unsupported function call: {ast.unparse(node)}")
+        name = node.func.id
+        _, min_args, max_args = _FUNCTIONS[name]
+        if len(node.args) < min_args or (max_args is not None and len(node.args) > max_args):
+            raise ExpressionError(f"Wrong number of arguments: {ast.unparse(node)}")
+        args = [_compile_node(arg) for arg in node.args]
+
+        def call(ctx):
+            ctx.check()
+            return _check_result(_call(name, [arg(ctx) for arg in args]))
+        return call
+
+    raise ExpressionError(f"Unsupported expression: {ast.unparse(node)}")
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression):
+    """
+    Parse and compile an arithmetic expression, caching the result.
+
+    Args:
+        expression (str): The expression, e.g. '2 * (3 + 4) ** 2'
+    Returns:
+        callable: A function taking a _Context and returning the value
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid syntax: {e.msg}") from None
+    return _compile_node(tree.body)
+
+def evaluate(expression, variables=None, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Safely evaluate an arithmetic expression.
+
+    Args:
+        expression (str): The expression to evaluate
+        variables (dict): Optional values for names used in the expression
+        time_limit (float): Maximum evaluation time in seconds, None to disable
+    Returns:
+        The numeric result
+    """
+    return compile_expression(expression)(_Context(variables or {}, time_limit))
+
+def evaluate_many(expressions, variables=None, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Evaluate many expressions in one call.
+
+    List-valued variables are converted to NumPy arrays when NumPy is
+    installed, so each expression is evaluated element-wise in a single
+    vectorized pass instead of once per element.
+
+    Args:
+        expressions (list): The expressions to evaluate
+        variables (dict): Optional values (scalars or lists) for names in the expressions
+        time_limit (float): Maximum evaluation time per expression in seconds
+    Returns:
+        list: One result per expression, or the ExpressionError raised by it
+    """
+    variables = dict(variables or {})
+    errstate = nullcontext()
+    if any(isinstance(value, (list, tuple)) for value in variables.values()) and _load_numpy() is not None:
+        # Overflowing float elements become inf and are rejected by _check_result() instead of warning
+        errstate = np.errstate(all="ignore")
+        for name, value in variables.items():
+            if isinstance(value, (list, tuple)):
+                variables[name] = np.asarray(value)
+                if variables[name].dtype.kind not in "iuf":
+                    raise ExpressionError(f"Variable {name} is not a list of numbers")
+
+    results = []
+    with errstate:
+        for expression in expressions:
+            try:
+                results.append(evaluate(expression, variables, time_limit))
+            except (ExpressionError, ArithmeticError, TypeError, ValueError) as e:
+                results.append(e if isinstance(e, ExpressionError) else ExpressionError(str(e)))
+    return results
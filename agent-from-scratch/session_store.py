@@ -0,0 +1,185 @@
+"""Persistent conversation history backed by SQLite.
+
+Messages are written one row at a time as they are appended, so a restart
+loses nothing, and a session is read back lazily: only the system prompt and
+as many of the newest turns as fit the context window. ``SessionManager`` keeps
+a bounded number of sessions resident and drops the least recently used ones,
+which is safe because their history is already on disk.
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+def to_dict(message):
+    """Plain-dict form of a chat message, which may be an ollama Message object"""
+    if hasattr(message, "model_dump"):
+        return message.model_dump(exclude_none=True)
+    return dict(message)
+
+def _jsonable(value):
+    # Pydantic values nested in a dict message, e.g. ToolCall objects
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class SessionStore:
+    """Append-only message log per session in one SQLite file.
+
+    Rows are clustered by (session_id, seq), so reading the tail of a session
+    touches only that session's newest pages, whatever the size of the file.
+    """
+
+    def __init__(self, path="sessions.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Durable against process crashes; only an OS crash can lose the last few turns
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, tokens INTEGER NOT NULL, message TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+        self._next_seq = {}
+
+    def _seq(self, session_id):
+        if session_id not in self._next_seq:
+            row = self._db.execute("SELECT MAX(seq) FROM messages WHERE session_id = ?", (session_id,)).fetchone()
+            self._next_seq[session_id] = 0 if row[0] is None else row[0] + 1
+        seq = self._next_seq[session_id]
+        self._next_seq[session_id] = seq + 1
+        return seq
+
+    def append(self, session_id, message, tokens=0):
+        """
+        Persist one message at the end of a session.
+
+        Args:
+            session_id (str): The conversation the message belongs to
+            message: A chat message dict or ollama Message
+            tokens (int): Token estimate, used to size the tail when loading
+        """
+        message = to_dict(message)
+        data = json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=_jsonable)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO messages (session_id, seq, role, tokens, message) VALUES (?, ?, ?, ?, ?)",
+                (session_id, self._seq(session_id), message["role"], tokens, data),
+            )
+
+    def load_tail(self, session_id, max_tokens=None):
+        """
+        Load the leading system messages of a session plus the newest whole turns
+        that fit in ``max_tokens`` (all turns when it is None).
+
+        Returns:
+            list: Message dicts in conversation order, empty for an unknown session
+        """
+        with self._lock:
+            if max_tokens is None:
+                rows = self._db.execute("SELECT message FROM messages WHERE session_id = ? ORDER BY seq", (session_id,))
+                return [json.loads(row[0]) for row in rows]
+
+            pinned = []
+            for seq, role, tokens, message in self._db.execute(
+                "SELECT seq, role, tokens, message FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ):
+                if role != "system":
+                    break
+                pinned.append((seq, tokens, message))
+            budget = max_tokens - sum(tokens for _, tokens, _ in pinned)
+            after = pinned[-1][0] if pinned else -1
+
+            # Walk back from the newest message until the budget is spent. Only whole
+            # turns (a user message and what followed it) are kept, and the newest
+            # turn always is, like in SlidingWindowMemory.
+            tail, turn = [], []
+            for role, tokens, message in self._db.execute(
+                "SELECT role, tokens, message FROM messages WHERE session_id = ? AND seq > ? ORDER BY seq DESC",
+                (session_id, after),
+            ):
+                budget -= tokens
+                if budget < 0 and tail:
+                    break
+                turn.append(message)
+                if role == "user":
+                    tail.extend(turn)
+                    turn = []
+
+        messages = [message for _, _, message in pinned] + tail[::-1]
+        return [json.loads(message) for message in messages]
+
+    def count(self, session_id):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def sessions(self):
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT DISTINCT session_id FROM messages")]
+
+    def delete(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._next_seq.pop(session_id, None)
+
+    def attach(self, session_id, memory):
+        """
+        Resume a session in a memory manager, or start it if the store has never seen it.
+
+        The memory is filled with the stored tail that fits its budget (replacing
+        the system prompt the agent just added), and every message appended from
+        then on is written to the store.
+        """
+        tail = self.load_tail(session_id, memory.max_tokens)
+        if tail:
+            memory.restore(tail)
+        else:
+            for message in memory.messages:
+                self.append(session_id, message, memory.estimate_tokens(message))
+        memory.persist_to(self, session_id)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class SessionManager:
+    """Keep at most ``max_resident`` agents in memory, loading the others on demand.
+
+    ``make_agent`` builds a fresh agent and must store its history in
+    ``agent.memory``; the manager attaches that memory to the store.
+    """
+
+    def __init__(self, store, make_agent, max_resident=1000):
+        self.store = store
+        self.make_agent = make_agent
+        self.max_resident = max_resident
+        self.loads = 0
+        self.evictions = 0
+        self._agents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """Return the agent for a session, loading it from the store if it is not resident"""
+        with self._lock:
+            agent = self._agents.get(session_id)
+            if agent is not None:
+                self._agents.move_to_end(session_id)
+                return agent
+
+            # Loading under the lock means a new session is only started once
+            agent = self.make_agent()
+            self.store.attach(session_id, agent.memory)
+            self._agents[session_id] = agent
+            self.loads += 1
+            while len(self._agents) > self.max_resident:
+                self._agents.popitem(last=False)
+                self.evictions += 1
+            return agent
+
+    def __len__(self):
+        return len(self._agents)
+
+    def stats(self):
+        return {"resident": len(self._agents), "max_resident": self.max_resident, "loads": self.loads, "evictions": self.evictions}
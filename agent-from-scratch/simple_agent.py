@@ -1,12 +1,14 @@
 import os
 import argparse
-from ollama import Client
 
 class Agent:
     """A simple AI agent that can answer questions"""
 
-    def __init__(self, model='granite4:tiny-h'):
-        self.client = Client()
+    def __init__(self, model='granite4:tiny-h', client=None):
+        if client is None:
+            from ollama import Client
+            client = Client()
+        self.client = client
         self.model = model
         self.system_message = "You are a helpful assistant that breaks down problems into steps and solves them systematically."
 
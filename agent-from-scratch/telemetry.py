@@ -0,0 +1,184 @@
+"""Logging, metrics and tracing for the agents.
+
+Everything here is optional: without prometheus_client the metrics are
+no-ops, without opentelemetry the spans are no-ops, and log calls below the
+configured level return after a single level check. Both packages are
+imported on first use rather than when an agent script starts.
+"""
+import contextlib
+import json
+import logging
+import threading
+
+logger = logging.getLogger("agentforge")
+
+def log(level, event, **fields):
+    """
+    Log a structured event.
+
+    Args:
+        level (int): A logging level, e.g. logging.DEBUG
+        event (str): Short description of what happened
+        **fields: Key/value details attached to the record
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+class _StructuredFormatter(logging.Formatter):
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        if self.as_json:
+            return json.dumps({"level": record.levelname, "event": record.getMessage(), **fields}, default=str)
+        details = " ".join(f"{key}={value!r}" for key, value in fields.items())
+        return f"{record.levelname}: {record.getMessage()}" + (f" {details}" if details else "")
+
+def configure_logging(level="WARNING", as_json=False):
+    """Send agent logs to stderr as key=value text or one JSON object per line"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(_StructuredFormatter(as_json=as_json))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+# Registering a metric twice raises, so threads resolving the same metric take turns
+_metrics_lock = threading.Lock()
+
+class _LazyMetric:
+    """A metric that imports prometheus_client and registers itself on first use"""
+
+    def __init__(self, kind, name, documentation, labels=(), **kwargs):
+        self._args = (kind, name, documentation, labels, kwargs)
+        self._metric = None
+
+    def _resolve(self):
+        if self._metric is None:
+            with _metrics_lock:
+                if self._metric is None:
+                    kind, name, documentation, labels, kwargs = self._args
+                    try:
+                        import prometheus_client
+                    except ImportError:
+                        self._metric = _NoopMetric()
+                    else:
+                        self._metric = getattr(prometheus_client, kind)(name, documentation, labels, **kwargs)
+        return self._metric
+
+    def labels(self, *args, **kwargs):
+        return self._resolve().labels(*args, **kwargs)
+
+    def observe(self, value):
+        self._resolve().observe(value)
+
+    def inc(self, amount=1):
+        self._resolve().inc(amount)
+
+_METRICS = []
+
+def _histogram(name, documentation, labels=(), **kwargs):
+    metric = _LazyMetric("Histogram", name, documentation, labels, **kwargs)
+    _METRICS.append(metric)
+    return metric
+
+def _counter(name, documentation, labels=()):
+    metric = _LazyMetric("Counter", name, documentation, labels)
+    _METRICS.append(metric)
+    return metric
+
+MODEL_CALL_SECONDS = _histogram("agent_model_call_seconds", "Latency of one model call", ["model"])
+TIME_TO_FIRST_TOKEN_SECONDS = _histogram("agent_time_to_first_token_seconds", "Time until the first streamed token", ["model"])
+PROMPT_TOKENS = _counter("agent_prompt_tokens", "Prompt tokens evaluated by the model", ["model"])
+COMPLETION_TOKENS = _counter("agent_completion_tokens", "Tokens generated by the model", ["model"])
+TOOL_SECONDS = _histogram("agent_tool_seconds", "Execution time of one tool call", ["tool"])
+LOAD_SECONDS = _histogram("agent_model_load_seconds", "Time Ollama spent loading the model for a call", ["model"])
+PROMPT_EVAL_SECONDS = _histogram("agent_prompt_eval_seconds", "Time Ollama spent evaluating the prompt", ["model"])
+EVAL_SECONDS = _histogram("agent_eval_seconds", "Time Ollama spent generating the response", ["model"])
+MODEL_STRATEGY_OUTCOMES = _counter("agent_model_strategy_outcomes", "Candidate responses in a multi-model strategy by outcome", ["strategy", "model", "outcome"])
+LOOP_ITERATIONS = _histogram("agent_loop_iterations", "Model calls needed to answer one chat() message", buckets=(1, 2, 3, 4, 6, 8, 12, 16))
+
+def model_timings(response, seconds):
+    """
+    Break a model call down using the durations Ollama reports (in nanoseconds).
+
+    A large load_seconds means the model was cold. Prompt tokens only count the
+    part of the prompt Ollama had to evaluate, so a prompt whose prefix was
+    still cached shows few prompt tokens and a short prompt_eval_seconds.
+    """
+    def to_seconds(name):
+        value = response.get(name)
+        return value / 1e9 if value is not None else None
+
+    return {
+        "total_seconds": seconds,
+        "load_seconds": to_seconds('load_duration'),
+        "prompt_eval_seconds": to_seconds('prompt_eval_duration'),
+        "eval_seconds": to_seconds('eval_duration'),
+        "prompt_tokens": response.get('prompt_eval_count'),
+        "completion_tokens": response.get('eval_count'),
+    }
+
+def record_model_response(model, response, seconds):
+    """
+    Record latency, Ollama's duration breakdown and token counts for a model
+    response (or the final streamed chunk).
+
+    Returns:
+        dict: The timings from model_timings()
+    """
+    timings = model_timings(response, seconds)
+    MODEL_CALL_SECONDS.labels(model).observe(seconds)
+    PROMPT_TOKENS.labels(model).inc(timings["prompt_tokens"] or 0)
+    COMPLETION_TOKENS.labels(model).inc(timings["completion_tokens"] or 0)
+    for histogram, key in ((LOAD_SECONDS, "load_seconds"), (PROMPT_EVAL_SECONDS, "prompt_eval_seconds"), (EVAL_SECONDS, "eval_seconds")):
+        if timings[key] is not None:
+            histogram.labels(model).observe(timings[key])
+    log(logging.DEBUG, "model call", model=model, **{key: round(value, 4) if isinstance(value, float) else value for key, value in timings.items()})
+    return timings
+
+def start_metrics_server(port):
+    """Serve the metrics for Prometheus at http://0.0.0.0:<port>/metrics"""
+    try:
+        from prometheus_client import start_http_server
+    except ImportError:
+        raise RuntimeError("prometheus_client is not installed; run `pip install prometheus_client`") from None
+    # Register every metric now, so all of them are exported before their first observation
+    for metric in _METRICS:
+        metric._resolve()
+    start_http_server(port)
+
+# False until the first span, then the tracer or None when opentelemetry is missing
+_tracer = False
+
+def _get_tracer():
+    global _tracer
+    if _tracer is False:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            _tracer = None
+        else:
+            _tracer = trace.get_tracer("agentforge")
+    return _tracer
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """An OpenTelemetry span when opentelemetry is installed, otherwise nothing"""
+    tracer = _get_tracer()
+    if tracer is None:
+        yield
+        return
+    with tracer.start_as_current_span(name, attributes=attributes):
+        yield
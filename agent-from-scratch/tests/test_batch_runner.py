@@ -0,0 +1,56 @@
+import asyncio
+import io
+import json
+
+from batch_runner import completed_ids, run_batch
+
+class FakeClient:
+    """Answers every question with its own text, failing the ones containing 'fail'"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def chat(self, **request):
+        # The agent keeps appending to its message list, so keep a copy
+        self.requests.append(dict(request, messages=list(request["messages"])))
+        question = request["messages"][-1]["content"]
+        if "fail" in question:
+            raise RuntimeError("model unavailable")
+        return {"message": {"role": "assistant", "content": f"answer to {question}"}}
+
+def run(lines, client, **kwargs):
+    output = io.StringIO()
+    stats = asyncio.run(run_batch(lines, output, "test-model", client=client, tool_cache=False, **kwargs))
+    return stats, [json.loads(line) for line in output.getvalue().splitlines()]
+
+def test_answers_every_question_in_a_fresh_conversation():
+    client = FakeClient()
+    lines = [json.dumps({"id": f"q{i}", "question": f"question {i}"}) for i in range(6)]
+    stats, results = run(lines, client, workers=2, warm_up=False)
+    assert stats.answered == 6
+    assert {result["id"]: result["answer"] for result in results} == {f"q{i}": f"answer to question {i}" for i in range(6)}
+    # Each request holds the system prompt and its own question only
+    assert all(len(request["messages"]) == 2 for request in client.requests)
+
+def test_resume_skips_answered_ids_and_retries_errors(tmp_path):
+    output_path = tmp_path / "answers.jsonl"
+    lines = [json.dumps({"id": "q1", "question": "one"}), json.dumps({"id": "q2", "question": "fail two"}), json.dumps({"id": "q3", "question": "three"})]
+    stats, results = run(lines, FakeClient(), workers=2, warm_up=False)
+    assert (stats.answered, stats.failed) == (2, 1)
+    # The last line was cut short when the previous run was killed
+    output_path.write_text("".join(json.dumps(result) + "\n" for result in results) + '{"id": "q4", "ans')
+    assert completed_ids(output_path) == {"q1", "q3"}
+
+    lines[1] = json.dumps({"id": "q2", "question": "two"})
+    client = FakeClient()
+    stats, results = run(lines, client, workers=2, warm_up=False, skip=completed_ids(output_path))
+    assert (stats.answered, stats.failed, stats.skipped) == (1, 0, 2)
+    assert [result["id"] for result in results] == ["q2"]
+
+    output_path.write_text(output_path.read_text() + "\n" + json.dumps(results[0]) + "\n")
+    assert completed_ids(output_path) == {"q1", "q2", "q3"}
+
+def test_bad_lines_are_reported_as_failures():
+    stats, results = run(["not json", "", json.dumps({"id": "q1"})], FakeClient(), workers=1, warm_up=False)
+    assert stats.failed == 2
+    assert [result["id"] for result in results] == ["1", "3"]
@@ -0,0 +1,75 @@
+from memory import ConversationMemory, SlidingWindowMemory, SummarizingMemory
+
+SYSTEM = {"role": "system", "content": "You are a helpful assistant."}
+
+def turn(i, words=40):
+    text = " ".join(f"word{i}" for _ in range(words))
+    return [{"role": "user", "content": f"question {i} {text}"}, {"role": "assistant", "content": f"answer {i} {text}"}]
+
+def fill(memory, turns):
+    memory.append(SYSTEM)
+    for i in range(turns):
+        for message in turn(i):
+            memory.append(message)
+
+def test_unbounded_memory_keeps_everything():
+    memory = ConversationMemory()
+    fill(memory, 10)
+    assert len(memory.messages) == 21
+    assert memory.token_count == sum(memory.estimate_tokens(message) for message in memory.messages)
+
+def test_sliding_window_evicts_whole_turns_under_budget():
+    memory = SlidingWindowMemory(max_tokens=500)
+    fill(memory, 10)
+    assert memory.token_count <= memory.max_tokens
+    assert memory.messages[0] == SYSTEM
+    # Whole turns are evicted, oldest first, so the rest alternate user/assistant up to the newest
+    roles = [message["role"] for message in memory.messages[1:]]
+    assert roles == ["user", "assistant"] * (len(roles) // 2)
+    assert memory.messages[-1]["content"].startswith("answer 9")
+    stats = memory.stats()
+    assert stats["messages_evicted"] == 21 - len(memory.messages)
+    assert stats["tokens_evicted"] == stats["tokens_saved_per_call"] > 0
+    assert memory.token_count == sum(memory.estimate_tokens(message) for message in memory.messages)
+
+def test_sliding_window_keeps_the_current_turn_over_budget():
+    memory = SlidingWindowMemory(max_tokens=20)
+    fill(memory, 1)
+    assert len(memory.messages) == 3
+
+def test_tool_calls_are_evicted_with_their_results():
+    memory = SlidingWindowMemory(max_tokens=200)
+    memory.append(SYSTEM)
+    for i in range(5):
+        memory.append({"role": "user", "content": f"what is {i} * {i}? " * 10})
+        memory.append({"role": "assistant", "content": "", "tool_calls": [{"function": {"name": "calculator", "arguments": {"expression": f"{i}*{i}"}}}]})
+        memory.append({"role": "tool", "content": str(i * i), "tool_name": "calculator"})
+        memory.append({"role": "assistant", "content": f"It is {i * i}."})
+    assert memory.messages[1]["role"] == "user"
+    for index, message in enumerate(memory.messages):
+        if message["role"] == "tool":
+            assert "tool_calls" in memory.messages[index - 1]
+
+def test_summarizing_memory_folds_evicted_turns_into_one_summary():
+    calls = []
+
+    def summarizer(previous, messages):
+        calls.append((previous, len(messages)))
+        return f"summary {len(calls)}"
+
+    memory = SummarizingMemory(summarizer, max_tokens=500)
+    fill(memory, 10)
+    assert calls and calls[0][0] == ""
+    summaries = [message for message in memory.messages if message["content"].startswith(SummarizingMemory.SUMMARY_PREFIX)]
+    assert summaries == [memory.messages[1]]
+    assert memory.summary == f"summary {len(calls)}"
+    stats = memory.stats()
+    assert stats["summary_tokens"] == memory.estimate_tokens(memory.messages[1])
+    assert stats["tokens_saved_per_call"] == stats["tokens_evicted"] - stats["summary_tokens"]
+
+def test_summarizing_memory_restores_its_summary():
+    memory = SummarizingMemory(lambda previous, messages: "unused", max_tokens=500)
+    memory.restore([SYSTEM, {"role": "system", "content": SummarizingMemory.SUMMARY_PREFIX + "earlier facts"}])
+    assert memory.summary == "earlier facts"
+    memory.restore([SYSTEM])
+    assert memory.summary == ""
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import pytest
+
+from agent_loop import Agent, CalculatorTool
+from async_agent import AsyncAgent
+from model_strategy import Escalate, ModelStrategy, Race
+
+# model: (seconds to answer, content); an empty answer is rejected
+BEHAVIOUR = {
+    "tiny": (0.0, ""),
+    "small": (0.01, "small answer"),
+    "large": (0.3, "large answer"),
+}
+
+def answer(request):
+    seconds, content = BEHAVIOUR[request["model"]]
+    return seconds, {"message": {"role": "assistant", "content": content}, "done": True}
+
+class Client:
+    def __init__(self):
+        self.models = []
+
+    def chat(self, **request):
+        self.models.append(request["model"])
+        seconds, response = answer(request)
+        time.sleep(seconds)
+        return response
+
+class AsyncClient(Client):
+    async def chat(self, **request):
+        self.models.append(request["model"])
+        seconds, response = answer(request)
+        await asyncio.sleep(seconds)
+        return response
+
+def test_strategy_must_implement_call_and_acall():
+    with pytest.raises(TypeError):
+        ModelStrategy(["tiny", "large"])
+
+    class CallOnly(ModelStrategy):
+        def call(self, agent, request):
+            return None
+
+    with pytest.raises(TypeError):
+        CallOnly(["tiny", "large"])
+
+def test_needs_a_fallback():
+    with pytest.raises(ValueError):
+        Escalate(["large"])
+
+def test_escalate_falls_back_when_a_response_is_rejected():
+    client = Client()
+    agent = Agent(model="tiny", client=client, tools=[CalculatorTool()], tool_cache=False, strategy=Escalate(["tiny", "large"]))
+    assert agent.chat("Hi") == "large answer"
+    assert agent.last_model == "large"
+    assert client.models == ["tiny", "large"]
+
+def test_escalate_stops_at_the_first_usable_answer():
+    client = Client()
+    agent = Agent(model="tiny", client=client, tools=[CalculatorTool()], tool_cache=False, strategy=Escalate(["tiny", "small", "large"]))
+    assert agent.chat("Hi") == "small answer"
+    assert client.models == ["tiny", "small"]
+
+def test_escalate_moves_on_after_the_latency_budget():
+    strategy = Escalate(["large", "small"], budget=0.05)
+    agent = Agent(model="large", client=Client(), tools=[CalculatorTool()], tool_cache=False, strategy=strategy)
+    start = time.perf_counter()
+    try:
+        assert agent.chat("Hi") == "small answer"
+        assert time.perf_counter() - start < 0.25
+    finally:
+        strategy.shutdown()
+
+def test_race_returns_the_first_accepted_answer():
+    strategy = Race(["tiny", "small", "large"])
+    agent = Agent(model="tiny", client=Client(), tools=[CalculatorTool()], tool_cache=False, strategy=strategy)
+    start = time.perf_counter()
+    try:
+        # tiny answers first but is rejected; small is accepted before the fallback finishes
+        assert agent.chat("Hi") == "small answer"
+        assert agent.last_model == "small"
+        assert time.perf_counter() - start < 0.25
+    finally:
+        strategy.shutdown()
+
+def test_async_race_returns_the_first_accepted_answer():
+    async def main():
+        client = AsyncClient()
+        agent = AsyncAgent(model="tiny", client=client, tools=[CalculatorTool()], tool_cache=False, strategy=Race(["tiny", "small", "large"]))
+        start = time.perf_counter()
+        content = await agent.chat("Hi")
+        return content, agent.last_model, time.perf_counter() - start
+
+    content, model, seconds = asyncio.run(main())
+    assert (content, model) == ("small answer", "small")
+    # The fallback's request was cancelled, not waited for
+    assert seconds < 0.25
+
+def test_async_escalate_falls_back_when_a_response_is_rejected():
+    async def main():
+        client = AsyncClient()
+        agent = AsyncAgent(model="tiny", client=client, tools=[CalculatorTool()], tool_cache=False, strategy=Escalate(["tiny", "large"]))
+        return await agent.chat("Hi"), client.models
+
+    assert asyncio.run(main()) == ("large answer", ["tiny", "large"])
@@ -0,0 +1,65 @@
+import pytest
+
+from agent_loop import Agent, CalculatorTool
+from replay import Recorder, Replay, ReplayMiss
+
+class ScriptedClient:
+    """Asks for the calculator once, then answers with the tool's result"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, **request):
+        self.calls += 1
+        last = request["messages"][-1]
+        if last["role"] == "tool":
+            message = {"role": "assistant", "content": f"The answer is {last['content']}."}
+        else:
+            message = {"role": "assistant", "content": "", "tool_calls": [{"function": {"name": "calculator", "arguments": {"expression": "12 * 4"}}}]}
+        if request.get("stream"):
+            return iter([{"message": message, "done": False}, {"message": {"role": "assistant", "content": ""}, "done": True}])
+        return {"message": message, "done": True}
+
+class CountingCalculator(CalculatorTool):
+    def __init__(self):
+        self.calls = 0
+
+    def execute(self, expression):
+        self.calls += 1
+        return super().execute(expression)
+
+def make_agent(client, tool_cache, tool):
+    return Agent(model="test-model", client=client, tool_cache=tool_cache, tools=[tool], keep_alive="-1m")
+
+@pytest.mark.parametrize("filename", ["session.jsonl", "session.jsonl.gz"])
+def test_recorded_session_replays_without_model_or_tools(tmp_path, filename):
+    path = str(tmp_path / filename)
+    live_client, live_tool = ScriptedClient(), CountingCalculator()
+    recorder = Recorder(path)
+    agent = make_agent(recorder.wrap_client(live_client), recorder.wrap_tools(), live_tool)
+    answer = agent.chat("What is 12 times 4?")
+    streamed = "".join(agent.stream_chat("And again?"))
+    recorder.close()
+    assert live_client.calls == 4 and live_tool.calls == 2
+
+    playback = Replay(path)
+    replay_tool = CountingCalculator()
+    agent = make_agent(playback.client(), playback.tool_cache(strict=True), replay_tool)
+    assert agent.chat("What is 12 times 4?") == answer
+    assert "".join(agent.stream_chat("And again?")) == streamed
+    assert replay_tool.calls == 0
+    assert playback.stats()["misses"] == 0
+
+    # A conversation that was never recorded misses instead of reaching a model
+    agent = make_agent(playback.client(), playback.tool_cache(strict=True), replay_tool)
+    with pytest.raises(ReplayMiss):
+        agent.chat("Something else")
+
+def test_replay_falls_back_to_a_live_client(tmp_path):
+    path = str(tmp_path / "empty.jsonl")
+    Recorder(path).close()
+    fallback = ScriptedClient()
+    playback = Replay(path)
+    agent = make_agent(playback.client(fallback=fallback), playback.tool_cache(), CountingCalculator())
+    assert agent.chat("What is 12 times 4?") == 'The answer is {"result": 48}.'
+    assert fallback.calls == 2
@@ -0,0 +1,40 @@
+import json
+import time
+
+import pytest
+
+from safe_eval import ExpressionError, evaluate, evaluate_many
+
+def test_arithmetic():
+    assert evaluate("2 * (3 + 4) ** 2") == 98
+    assert evaluate("round(2.567, 2)") == 2.57
+    assert evaluate("max(1, 2, 3)") == 3
+    assert evaluate("log(8, 2)") == 3.0
+
+@pytest.mark.parametrize("expression", [
+    "9**9**9",
+    "round(5, -100000000)",
+    "round(5, 100000000)",
+    "round(1.5, 2.0)",
+    "min(1)",
+    "sqrt(1, 2)",
+    "1e308 * 10",
+    "__import__('os')",
+])
+def test_rejected_quickly(expression):
+    start = time.monotonic()
+    with pytest.raises(ExpressionError):
+        evaluate(expression)
+    assert time.monotonic() - start < 0.1
+
+def test_many_arrays():
+    pytest.importorskip("numpy")
+    squares, too_large, not_finite = evaluate_many(["x**2", "x**100000", "x * 1e308 * 10"], {"x": [1, 2, 3]})
+    assert squares.tolist() == [1, 4, 9]
+    assert isinstance(too_large, ExpressionError)
+    assert isinstance(not_finite, ExpressionError)
+
+def test_results_are_json():
+    for result in evaluate_many(["1e308 * 10", "2 ** 0.5", "10 // 3"]):
+        if not isinstance(result, ExpressionError):
+            json.loads(json.dumps(result, allow_nan=False))
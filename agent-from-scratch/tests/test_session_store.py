@@ -0,0 +1,62 @@
+from memory import ConversationMemory, SlidingWindowMemory
+from session_store import SessionManager, SessionStore
+
+SYSTEM = {"role": "system", "content": "You are a helpful assistant."}
+
+def write_session(store, session_id, turns):
+    store.append(session_id, SYSTEM, 10)
+    for i in range(turns):
+        store.append(session_id, {"role": "user", "content": f"question {i}"}, 30)
+        store.append(session_id, {"role": "assistant", "content": f"answer {i}"}, 70)
+
+def test_load_tail_keeps_system_prompt_and_newest_whole_turns(tmp_path):
+    store = SessionStore(tmp_path / "sessions.db")
+    write_session(store, "a", 5)
+    write_session(store, "b", 1)
+
+    assert len(store.load_tail("a")) == 11
+    # 10 for the system prompt leaves 300 tokens: three 100-token turns
+    tail = store.load_tail("a", max_tokens=310)
+    assert tail[0] == SYSTEM
+    assert [message["content"] for message in tail[1:]] == ["question 2", "answer 2", "question 3", "answer 3", "question 4", "answer 4"]
+    # One token short drops the oldest of those turns, never half of it
+    assert [message["content"] for message in store.load_tail("a", max_tokens=309)[1:]] == ["question 3", "answer 3", "question 4", "answer 4"]
+    # The newest turn is always loaded, even over budget
+    assert [message["content"] for message in store.load_tail("a", max_tokens=50)[1:]] == ["question 4", "answer 4"]
+    assert store.load_tail("b", max_tokens=310) == [SYSTEM, {"role": "user", "content": "question 0"}, {"role": "assistant", "content": "answer 0"}]
+    assert store.load_tail("unknown", max_tokens=310) == []
+
+def test_attach_persists_and_resumes_a_session(tmp_path):
+    path = tmp_path / "sessions.db"
+    memory = ConversationMemory()
+    memory.append(SYSTEM)
+    store = SessionStore(path)
+    store.attach("chat", memory)
+    memory.append({"role": "user", "content": "Hi"})
+    memory.append({"role": "assistant", "content": "Hello"})
+    store.close()
+
+    resumed = SlidingWindowMemory(max_tokens=1000)
+    resumed.append(SYSTEM)
+    store = SessionStore(path)
+    store.attach("chat", resumed)
+    assert resumed.messages == memory.messages
+    resumed.append({"role": "user", "content": "Again"})
+    assert store.count("chat") == 4
+
+def test_session_manager_evicts_and_reloads(tmp_path):
+    store = SessionStore(tmp_path / "sessions.db")
+
+    class Agent:
+        def __init__(self):
+            self.memory = ConversationMemory()
+            self.memory.append(SYSTEM)
+
+    manager = SessionManager(store, Agent, max_resident=2)
+    manager.get("a").memory.append({"role": "user", "content": "from a"})
+    manager.get("b")
+    manager.get("c")
+    assert len(manager) == 2
+    assert manager.stats()["evictions"] == 1
+    assert manager.get("a").memory.messages[-1] == {"role": "user", "content": "from a"}
+    assert manager.stats()["loads"] == 4
@@ -0,0 +1,18 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_startup import AGENT_DIR, BUDGETS_MS, GATEWAY_TARGETS
+
+# The budgets are for a laptop; raise this on a slow or busy CI runner
+BUDGET_SCALE = os.environ.get("STARTUP_BUDGET_SCALE", "1.5")
+
+def test_agent_scripts_start_within_budget():
+    targets = [target for target in BUDGETS_MS if target not in GATEWAY_TARGETS]
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--targets", ",".join(targets), "--repeat", "3", "--budget-scale", BUDGET_SCALE],
+        cwd=AGENT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
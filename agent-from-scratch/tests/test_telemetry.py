@@ -0,0 +1,24 @@
+import threading
+
+import telemetry
+
+def test_metric_resolved_once_from_many_threads():
+    metric = telemetry._LazyMetric("Counter", "test_concurrent_resolve", "A metric resolved from many threads", ["tool"])
+    barrier = threading.Barrier(16)
+    resolved, errors = [], []
+
+    def observe():
+        barrier.wait()
+        try:
+            resolved.append(metric._resolve())
+            metric.labels("calculator").inc()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=observe) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len({id(m) for m in resolved}) == 1
@@ -0,0 +1,42 @@
+import sqlite3
+
+from tool_cache import ToolCache
+
+class Square:
+    pure = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def execute(self, x):
+        self.calls += 1
+        return {"result": x * x}
+
+def test_memoizes_pure_tool():
+    cache, tool = ToolCache(), Square()
+    assert cache.call("square", tool, {"x": 3}) == {"result": 9}
+    assert cache.call("square", tool, {"x": 3}) == {"result": 9}
+    assert tool.calls == 1
+
+def test_locked_database_is_a_miss(tmp_path):
+    db_path = tmp_path / "tools.db"
+    cache, tool = ToolCache(db_path=db_path), Square()
+    other = sqlite3.connect(db_path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        assert cache.call("square", tool, {"x": 3}) == {"result": 9}
+        cache._entries.clear()
+        assert cache.call("square", tool, {"x": 3}) == {"result": 9}
+    finally:
+        other.execute("ROLLBACK")
+    assert tool.calls == 2
+
+def test_database_is_trimmed(tmp_path):
+    cache = ToolCache(db_path=tmp_path / "tools.db", db_max_entries=10)
+    cache.PURGE_EVERY = 5
+    for x in range(23):
+        cache.set(str(x), x, 60)
+    cache.set("expired", 0, -1)
+    cache.purge_expired()
+    keys = [key for key, in cache._db.execute("SELECT key FROM tool_results ORDER BY rowid")]
+    assert keys == [str(x) for x in range(13, 23)]
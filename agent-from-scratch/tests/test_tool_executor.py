@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tool_executor import ToolExecutor
+
+class SleepTool:
+    """Sleeps, then echoes its argument; counts how many calls run at once"""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def execute(self, value, seconds=0.0):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(seconds)
+            return {"result": value}
+        finally:
+            with self._lock:
+                self.running -= 1
+
+class AsyncSleepTool:
+    async def execute(self, value, seconds=0.0):
+        await asyncio.sleep(seconds)
+        return {"result": value}
+
+@pytest.mark.parametrize("mode", ToolExecutor.MODES)
+def test_results_in_call_order(mode):
+    tool, async_tool = SleepTool(), AsyncSleepTool()
+    calls = [
+        ("sleep", tool, {"value": 0, "seconds": 0.05}),
+        ("async_sleep", async_tool, {"value": 1, "seconds": 0.03}),
+        ("sleep", tool, {"value": 2, "seconds": 0.0}),
+        ("async_sleep", async_tool, {"value": 3, "seconds": 0.0}),
+    ]
+    executor = ToolExecutor(mode=mode)
+    try:
+        assert executor.run(calls) == [{"result": value} for value in range(4)]
+    finally:
+        executor.shutdown()
+
+def test_concurrent_calls_overlap():
+    tool = SleepTool()
+    executor = ToolExecutor(mode="concurrent", max_concurrency=4)
+    start = time.perf_counter()
+    try:
+        executor.run([("sleep", tool, {"value": i, "seconds": 0.1}) for i in range(4)])
+    finally:
+        executor.shutdown()
+    assert time.perf_counter() - start < 0.3
+    assert tool.peak == 4
+
+def test_slow_tool_times_out_without_blocking_the_others():
+    tool = SleepTool()
+    executor = ToolExecutor(mode="concurrent", timeout=0.1)
+    start = time.perf_counter()
+    try:
+        results = executor.run([
+            ("sleep", tool, {"value": "slow", "seconds": 1.0}),
+            ("sleep", tool, {"value": "fast"}),
+            ("async_sleep", AsyncSleepTool(), {"value": "slow async", "seconds": 1.0}),
+        ])
+    finally:
+        executor.shutdown()
+    assert time.perf_counter() - start < 0.5
+    assert "timed out" in results[0]["error"]
+    assert results[1] == {"result": "fast"}
+    assert "timed out" in results[2]["error"]
+
+def test_timeout_starts_when_the_tool_runs():
+    # Two slots for four 0.1 s calls: the last two wait about 0.1 s, which must not count against them
+    tool = SleepTool()
+    executor = ToolExecutor(mode="concurrent", max_concurrency=2, timeout=0.15)
+    try:
+        results = executor.run([("sleep", tool, {"value": i, "seconds": 0.1}) for i in range(4)])
+    finally:
+        executor.shutdown()
+    assert results == [{"result": i} for i in range(4)]
+
+@pytest.mark.parametrize("max_concurrency", [1, 3])
+def test_max_concurrency_is_respected(max_concurrency):
+    tool = SleepTool()
+    executor = ToolExecutor(mode="concurrent", max_concurrency=max_concurrency)
+    try:
+        executor.run([("sleep", tool, {"value": i, "seconds": 0.02}) for i in range(8)])
+    finally:
+        executor.shutdown()
+    assert tool.peak == max_concurrency
+
+def test_failing_tool_does_not_discard_its_siblings():
+    class Broken:
+        def execute(self):
+            raise RuntimeError("boom")
+
+    executor = ToolExecutor(mode="concurrent")
+    try:
+        results = executor.run([("broken", Broken(), {}), ("sleep", SleepTool(), {"value": 1})])
+    finally:
+        executor.shutdown()
+    assert "boom" in results[0]["error"]
+    assert results[1] == {"result": 1}
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        ToolExecutor(mode="parallel")
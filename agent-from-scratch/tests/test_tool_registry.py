@@ -0,0 +1,52 @@
+import asyncio
+import inspect
+
+from tool_registry import FunctionTool, ToolRegistry
+
+def test_var_arguments_are_not_properties():
+    def search(query: str, *terms, limit: int = 5, **options):
+        """Search the notes.
+
+        Args:
+            query: What to look for
+            limit: Maximum number of results
+        """
+        return {"query": query, "limit": limit, "options": options}
+
+    schema = FunctionTool(search).get_schema()["input_schema"]
+    assert schema["properties"] == {
+        "query": {"type": "string", "description": "What to look for"},
+        "limit": {"type": "integer", "description": "Maximum number of results"},
+    }
+    assert schema["required"] == ["query"]
+
+def test_tool_context_is_passed_as_none():
+    async def get_context(ticker: str, tool_context) -> dict:
+        return {"ticker": ticker, "context": tool_context}
+
+    tool = FunctionTool(get_context)
+    assert list(tool.get_schema()["input_schema"]["properties"]) == ["ticker"]
+    assert inspect.iscoroutinefunction(tool.execute)
+    assert asyncio.run(tool.execute(ticker="AAPL")) == {"ticker": "AAPL", "context": None}
+
+class _Tool:
+    def __init__(self, name, *arg_names):
+        self.schema = {
+            "name": name,
+            "description": name,
+            "input_schema": {"type": "object", "properties": {arg: {"type": "integer"} for arg in arg_names}},
+        }
+
+    def get_schema(self):
+        return self.schema
+
+def test_infer_breaks_ties_by_registration_order():
+    registry = ToolRegistry([_Tool("first", "x"), _Tool("second", "z")])
+    assert registry.infer({"z": 1, "x": 1}) == "first"
+    assert registry.infer({"x": 1, "z": 1}) == "first"
+    assert registry.infer({"z": 1}) == "second"
+    assert registry.infer({"unknown": 1}) is None
+
+def test_infer_prefers_the_most_shared_arguments():
+    registry = ToolRegistry([_Tool("first", "x"), _Tool("second", "x", "y")])
+    assert registry.infer({"x": 1, "y": 2}) == "second"
@@ -0,0 +1,196 @@
+"""Memoization of tool results, keyed on the tool name and its arguments.
+
+Only tools that opt in are cached: a tool with ``pure = True`` always returns
+the same result for the same arguments, and a tool with ``cache_ttl = seconds``
+returns results that may be reused for that long (e.g. market data). Error
+results are never cached.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def cache_ttl(tool):
+    """
+    How long a tool's results may be reused.
+
+    Returns:
+        float: Seconds (infinite for pure tools), or None if the tool is not cacheable
+    """
+    ttl = getattr(tool, "cache_ttl", None)
+    if ttl is not None:
+        return ttl
+    return float("inf") if getattr(tool, "pure", False) else None
+
+def cache_key(tool_name, tool_args):
+    """Hash of the call with its arguments serialized canonically, so key order and formatting do not matter"""
+    canonical = json.dumps([tool_name, tool_args], sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class ToolCache:
+    """LRU cache of tool results bounded by entry count and total size.
+
+    With ``db_path`` set, results are also written to a SQLite file so that
+    several agent processes share them. A hit in SQLite is promoted into memory.
+    Every ``PURGE_EVERY`` writes, expired rows are deleted from the file and
+    the oldest rows past ``db_max_entries`` are evicted.
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(self, max_entries=4096, max_bytes=64 * 1024 * 1024, db_path=None, db_max_entries=100_000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.db_max_entries = db_max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        # key -> (expires, result, size in bytes)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_writes = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=1, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS tool_results (key TEXT PRIMARY KEY, expires REAL, value TEXT)")
+
+    def get(self, key):
+        """Return the cached result for a key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._discard(key)
+
+            if self._db is not None:
+                row = self._load(key)
+                if row is not None and row[0] > now:
+                    result = json.loads(row[1])
+                    self._remember(key, row[0], result, len(row[1]))
+                    self.hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    def set(self, key, result, ttl):
+        # Results the model will see as JSON anyway; anything else is not worth caching
+        try:
+            data = json.dumps(result, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        expires = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires, result, len(data))
+            if self._db is not None:
+                self._store(key, expires, data)
+
+    # The SQLite tier is only a shared cache: when the file stays locked past the
+    # timeout, a lookup counts as a miss and a write is dropped
+    def _load(self, key):
+        try:
+            return self._db.execute("SELECT expires, value FROM tool_results WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:
+            return None
+
+    def _store(self, key, expires, data):
+        try:
+            # Pure results never expire; store a far-future time rather than infinity
+            self._db.execute(
+                "INSERT OR REPLACE INTO tool_results (key, expires, value) VALUES (?, ?, ?)",
+                (key, min(expires, 1e18), data),
+            )
+        except sqlite3.OperationalError:
+            return
+        self._db_writes += 1
+        if self._db_writes % self.PURGE_EVERY == 0:
+            self._purge_db()
+
+    def _purge_db(self):
+        try:
+            self._db.execute("DELETE FROM tool_results WHERE expires <= ?", (time.time(),))
+            # A replaced row gets a new rowid, so the lowest rowids are the oldest writes
+            self._db.execute(
+                "DELETE FROM tool_results WHERE rowid IN "
+                "(SELECT rowid FROM tool_results ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                (self.db_max_entries,),
+            )
+        except sqlite3.OperationalError:
+            pass
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers and trim the SQLite file to db_max_entries"""
+        now = time.time()
+        with self._lock:
+            for key in [key for key, (expires, _, _) in self._entries.items() if expires <= now]:
+                self._discard(key)
+            if self._db is not None:
+                self._purge_db()
+
+    def _remember(self, key, expires, result, size):
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (expires, result, size)
+        self.size += size
+        while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _discard(self, key):
+        _, _, size = self._entries.pop(key)
+        self.size -= size
+
+    def call(self, tool_name, tool, tool_args):
+        """Run a synchronous tool, reusing a cached result when the tool allows it"""
+        ttl = cache_ttl(tool)
+        if ttl is None:
+            return tool.execute(**tool_args)
+        key = cache_key(tool_name, tool_args)
+        result = self.get(key)
+        if result is None:
+            result = tool.execute(**tool_args)
+            if not (isinstance(result, dict) and "error" in result):
+                self.set(key, result, ttl)
+        return result
+
+    async def acall(self, tool_name, tool, tool_args):
+        """Async version of call(), for tools whose execute is a coroutine function"""
+        ttl = cache_ttl(tool)
+        if ttl is None:
+            return await tool.execute(**tool_args)
+        key = cache_key(tool_name, tool_args)
+        result = self.get(key)
+        if result is None:
+            result = await tool.execute(**tool_args)
+            if not (isinstance(result, dict) and "error" in result):
+                self.set(key, result, ttl)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM tool_results")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+# Shared by every agent in the process unless one is given its own cache
+default_cache = ToolCache()
@@ -0,0 +1,141 @@
+import time
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from telemetry import span, TOOL_SECONDS
+
+class ToolExecutor:
+    """Runs the tool calls requested in a single model turn.
+
+    In "sequential" mode tools run one after another, exactly like the original
+    agent loop; from async code, sync tools still run on the thread pool so they
+    do not block the event loop. In "concurrent" mode independent calls are
+    dispatched together: sync tools run on a thread pool, async tools
+    (``async def execute``) run on the event loop. Results are always returned
+    in the original call order.
+
+    A sync tool that times out cannot be interrupted: it keeps its thread until
+    it returns, and only its result is discarded. The pool therefore has more
+    threads than ``max_concurrency``, so a few stuck tools do not leave the
+    calls behind them waiting for a free thread.
+    """
+
+    MODES = ("sequential", "concurrent")
+
+    # asyncio is imported in the methods that use it, so a sync agent with
+    # sync tools never pays for importing it
+
+    def __init__(self, mode="sequential", max_concurrency=4, timeout=None, cache=None, max_workers=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown tool execution mode: {mode!r} (expected one of {self.MODES})")
+        self.mode = mode
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        # Threads for sync tools, sized apart from max_concurrency because timed-out tools hold on to theirs
+        self.max_workers = max_workers or max(32, max_concurrency)
+        # Optional ToolCache for tools that declare themselves pure or give a cache_ttl
+        self.cache = cache
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+        return self._pool
+
+    def _timeout_for(self, tool):
+        # Tools may declare their own timeout, which overrides the executor default
+        return getattr(tool, "timeout", None) or self.timeout
+
+    def run(self, calls):
+        """
+        Execute a list of tool calls from synchronous code.
+
+        Args:
+            calls (list): (tool_name, tool, tool_args) tuples in the order the model requested them
+        Returns:
+            list: One result dict per call, in the same order
+        """
+        if self.mode == "sequential":
+            results = []
+            for tool_name, tool, tool_args in calls:
+                if inspect.iscoroutinefunction(tool.execute):
+                    import asyncio
+                    results.append(asyncio.run(self._timed_async(tool_name, tool, tool_args)))
+                else:
+                    results.append(self._timed(tool_name, tool, tool_args))
+            return results
+        import asyncio
+        return asyncio.run(self.arun(calls))
+
+    def _timed(self, tool_name, tool, tool_args):
+        with span("agent.tool", tool=tool_name):
+            start = time.perf_counter()
+            try:
+                if self.cache is not None:
+                    return self.cache.call(tool_name, tool, tool_args)
+                return tool.execute(**tool_args)
+            finally:
+                TOOL_SECONDS.labels(tool_name).observe(time.perf_counter() - start)
+
+    async def _timed_async(self, tool_name, tool, tool_args):
+        with span("agent.tool", tool=tool_name):
+            start = time.perf_counter()
+            try:
+                if self.cache is not None:
+                    return await self.cache.acall(tool_name, tool, tool_args)
+                return await tool.execute(**tool_args)
+            finally:
+                TOOL_SECONDS.labels(tool_name).observe(time.perf_counter() - start)
+
+    async def arun(self, calls):
+        """Execute a list of tool calls from a running event loop. See run()."""
+        import asyncio
+        if self.mode == "sequential":
+            results = []
+            for tool_name, tool, tool_args in calls:
+                if inspect.iscoroutinefunction(tool.execute):
+                    results.append(await self._timed_async(tool_name, tool, tool_args))
+                else:
+                    # Still one at a time, but off the event loop so other conversations keep running
+                    loop = asyncio.get_running_loop()
+                    results.append(await loop.run_in_executor(self._get_pool(), self._timed, tool_name, tool, tool_args))
+            return results
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(self._run_one(semaphore, *call) for call in calls))
+
+    async def _run_one(self, semaphore, tool_name, tool, tool_args):
+        import asyncio
+        async with semaphore:
+            # The timeout starts once the call is running, not while it waits for a slot or a thread
+            timeout = self._timeout_for(tool)
+            try:
+                if inspect.iscoroutinefunction(tool.execute):
+                    call = self._timed_async(tool_name, tool, tool_args)
+                else:
+                    call = await self._start_in_pool(tool_name, tool, tool_args)
+                return await asyncio.wait_for(call, timeout)
+            except asyncio.TimeoutError:
+                return {"error": f"Tool '{tool_name}' timed out after {timeout}s"}
+            except Exception as e:
+                # One failing tool must not discard the results of its siblings
+                return {"error": f"Tool '{tool_name}' failed: {str(e)}"}
+
+    async def _start_in_pool(self, tool_name, tool, tool_args):
+        """Submit a sync tool to the pool and return its future once a thread has picked it up"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def job():
+            loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+            return self._timed(tool_name, tool, tool_args)
+
+        future = loop.run_in_executor(self._get_pool(), job)
+        await asyncio.wait((started, future), return_when=asyncio.FIRST_COMPLETED)
+        return future
+
+    def shutdown(self):
+        """Release the worker threads. Tools that timed out are not waited for."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,178 @@
+import functools
+import inspect
+import types
+import typing
+
+# Parameters the model never fills in: *args/**kwargs, and the ToolContext that Google ADK passes its tools
+_SKIPPED_KINDS = (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+_CONTEXT_PARAMETERS = ("tool_context",)
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
+
+def _json_schema_for(annotation):
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union or origin is types.UnionType:
+        # Optional[X] and X | None describe X; other unions have no single JSON type
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return _json_schema_for(args[0])
+        return {"type": "string"}
+    origin = typing.get_origin(annotation) or annotation
+    schema = {"type": _JSON_TYPES.get(origin, "string")}
+    args = typing.get_args(annotation)
+    if origin is list and args:
+        schema["items"] = _json_schema_for(args[0])
+    return schema
+
+def _parse_docstring(docstring):
+    """Split a Google-style docstring into a description and per-argument descriptions"""
+    description_lines, arg_descriptions = [], {}
+    section = name = None
+    arg_indent = 0
+    for line in inspect.cleandoc(docstring or "").splitlines():
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+        if stripped in ("Args:", "Arguments:", "Parameters:"):
+            section, name = "args", None
+        elif stripped.endswith(":") and not line.startswith(" "):
+            section = "other"
+        elif section == "args" and stripped and name is not None and indent > arg_indent:
+            # A continuation line of the previous argument's description
+            arg_descriptions[name] = f"{arg_descriptions[name]} {stripped}".strip()
+        elif section == "args" and ":" in stripped:
+            name, text = stripped.split(":", 1)
+            # Accept both "name: text" and "name (type): text"
+            name = name.split("(")[0].strip()
+            arg_descriptions[name] = text.strip()
+            arg_indent = indent
+        elif section is None and stripped:
+            description_lines.append(stripped)
+    return " ".join(description_lines), arg_descriptions
+
+class FunctionTool:
+    """Expose a plain typed Python function as a tool.
+
+    The schema is built once from the function's signature, type hints and
+    Google-style docstring.
+    """
+
+    def __init__(self, function, name=None, description=None, pure=False, cache_ttl=None):
+        self.function = function
+        # Async functions stay async so the ToolExecutor can await them
+        self.execute = function
+        # Read by the ToolCache: pure results are reused forever, others for cache_ttl seconds
+        self.pure = pure
+        self.cache_ttl = cache_ttl
+
+        doc_description, arg_descriptions = _parse_docstring(function.__doc__)
+        hints = typing.get_type_hints(function)
+        properties, required = {}, []
+        for param in inspect.signature(function).parameters.values():
+            if param.kind in _SKIPPED_KINDS:
+                continue
+            if param.name in _CONTEXT_PARAMETERS:
+                # Outside ADK there is no context to pass
+                if param.default is inspect.Parameter.empty:
+                    self.execute = functools.partial(self.execute, **{param.name: None})
+                continue
+            prop = _json_schema_for(hints.get(param.name, str))
+            if param.name in arg_descriptions:
+                prop["description"] = arg_descriptions[param.name]
+            properties[param.name] = prop
+            if param.default is inspect.Parameter.empty:
+                required.append(param.name)
+
+        self._schema = {
+            "name": name or function.__name__,
+            "description": description or doc_description,
+            "input_schema": {"type": "object", "properties": properties, "required": required},
+        }
+
+    def get_schema(self):
+        return self._schema
+
+class ToolRegistry:
+    """Holds the agent's tools and everything derived from their schemas.
+
+    Schemas are computed once at registration, the payload sent to Ollama is
+    built once, and an index from argument names to tools lets the agent
+    infer which tool a malformed tool call meant without rescanning schemas.
+    """
+
+    def __init__(self, tools=None):
+        self.tools = {}
+        self._schemas = {}
+        self._arg_index = {}
+        self._payload = None
+        for tool in tools or []:
+            self.register(tool)
+
+    def register(self, tool):
+        schema = tool.get_schema()
+        name = schema["name"]
+        self.tools[name] = tool
+        self._schemas[name] = schema
+        for arg_name in schema["input_schema"].get("properties", {}):
+            self._arg_index.setdefault(arg_name, []).append(name)
+        self._payload = None
+        return tool
+
+    def register_function(self, function, name=None, description=None, pure=False, cache_ttl=None):
+        """Register a plain typed Python function as a tool"""
+        return self.register(FunctionTool(function, name=name, description=description, pure=pure, cache_ttl=cache_ttl))
+
+    def __contains__(self, name):
+        return name in self.tools
+
+    def __len__(self):
+        return len(self.tools)
+
+    def get(self, name):
+        return self.tools.get(name)
+
+    def schema(self, name):
+        return self._schemas[name]
+
+    @property
+    def schemas(self):
+        return list(self._schemas.values())
+
+    @property
+    def payload(self):
+        """The tools argument for client.chat, built once as Ollama Tool objects"""
+        if self._payload is None:
+            from ollama import Tool
+            self._payload = [
+                Tool.model_validate({
+                    "type": "function",
+                    "function": {
+                        "name": schema["name"],
+                        "description": schema["description"],
+                        "parameters": schema["input_schema"],
+                    },
+                })
+                for schema in self._schemas.values()
+            ]
+        return self._payload
+
+    def infer(self, tool_args):
+        """
+        Guess which tool a call with an unknown name was meant for.
+
+        Args:
+            tool_args (dict): The arguments sent with the tool call
+        Returns:
+            str: The tool whose schema shares the most argument names, or None
+        """
+        matches = {}
+        for arg_name in tool_args:
+            for name in self._arg_index.get(arg_name, ()):
+                matches[name] = matches.get(name, 0) + 1
+        # Walk the tools in registration order and only replace on a strictly
+        # better score, so the first registered tool wins a tie
+        best, best_score = None, 0
+        for name in self.tools:
+            score = matches.get(name, 0)
+            if score > best_score:
+                best, best_score = name, score
+        return best
@@ -1,11 +1,18 @@
 import os
 import json
+import logging
 import argparse
-from ollama import Client
+from safe_eval import evaluate
+from tool_registry import ToolRegistry
+from tool_cache import default_cache
+from telemetry import log, configure_logging
 
 class CalculatorTool():
     """A tool for performing mathematical calculations"""
 
+    # The same expression always evaluates to the same result, so results can be cached
+    pure = True
+
     def get_schema(self):
         return {
             "name": "calculator",
@@ -25,7 +32,7 @@ class CalculatorTool():
     def execute(self, expression):
         """
         Evaluate mathematical expressions.
-        WARNING: This tutorial uses eval() for simplicity but it is not recommended for production use.
+        Uses the whitelisted evaluator in safe_eval instead of eval(), so only arithmetic is allowed.
 
         Args:
             expression (str): The mathematical expression to evaluate
@@ -33,8 +40,8 @@ class CalculatorTool():
             float: The result of the evaluation
         """
         try:
-            print(f"DEBUG: Using calculator tool to evaluate: {expression}")
-            result = eval(expression)
+            log(logging.DEBUG, "Using calculator tool", expression=expression)
+            result = evaluate(expression)
             return {"result": result}
         except:
             return {"error": "Invalid mathematical expression"}
@@ -42,15 +49,28 @@ class CalculatorTool():
 class Agent:
     """A simple AI agent that can use tools to answer questions in a multi-turn conversation"""
 
-    def __init__(self, model='granite4:tiny-h', tools=None):
-        self.client = Client()
+    def __init__(self, model='granite4:tiny-h', tools=None, client=None, tool_cache=None, keep_alive="30m"):
+        if client is None:
+            from ollama import Client
+            client = Client()
+        self.client = client
         self.model = model
+        # Keep the model loaded across the pauses between a user's messages
+        self.keep_alive = keep_alive
         self.messages = [{'role': 'system', 'content': "You are a helpful assistant. You MUST use the calculator tool for any mathematical calculations to ensure accuracy. For all other questions, answer directly."}]
         self.tools = tools or []
-        self.tool_map = {tool.get_schema()["name"]: tool for tool in self.tools}
+        # Schemas and the tools payload are computed once here, not on every model call
+        self.registry = ToolRegistry(self.tools)
+        self.tool_map = self.registry.tools
+        # Repeated calls to pure tools are answered from the process-wide cache (pass False to disable)
+        self.tool_cache = default_cache if tool_cache is None else (tool_cache or None)
 
     def _get_tool_schemas(self):
-        return [tool.get_schema() for tool in self.tools]
+        return self.registry.payload
+
+    def warm_up(self):
+        """Load the model and evaluate the system prompt and tools before the first message"""
+        self.client.chat(model=self.model, messages=self.messages[:1], tools=self._get_tool_schemas(), keep_alive=self.keep_alive, options={"num_predict": 1})
 
     def chat(self, message):
         self.messages.append({"role": "user", "content": message})
@@ -59,6 +79,7 @@ class Agent:
             model=self.model,
             messages=self.messages,
             tools=self._get_tool_schemas(),
+            keep_alive=self.keep_alive,
         )
 
         self.messages.append(response['message'])
@@ -66,25 +87,29 @@ class Agent:
         while response['message'].get("tool_calls"):
             tool_calls = response['message']["tool_calls"]
             for tool_call in tool_calls:
-                print(f"DEBUG: Received tool call object: {tool_call}")
+                log(logging.DEBUG, "Received tool call", tool_call=tool_call)
                 tool_name = tool_call['function']['name']
                 tool_args = tool_call['function']['arguments']
                 
                 if tool_name in self.tool_map:
                     tool = self.tool_map[tool_name]
-                    result = tool.execute(**tool_args)
+                    if self.tool_cache is not None:
+                        result = self.tool_cache.call(tool_name, tool, tool_args)
+                    else:
+                        result = tool.execute(**tool_args)
                     
                     self.messages.append({
                         'role': 'tool',
                         'content': json.dumps(result)
                     })
                 else:
-                    print(f"Unknown tool: {tool_name}")
+                    log(logging.WARNING, "Unknown tool", tool=tool_name)
 
             response = self.client.chat(
                 model=self.model,
                 messages=self.messages,
                 tools=self._get_tool_schemas(),
+                keep_alive=self.keep_alive,
             )
             self.messages.append(response['message'])
 
@@ -93,10 +118,17 @@ class Agent:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="A simple AI agent using Ollama with tool-use capabilities.")
     parser.add_argument("--model", type=str, default="granite4:tiny-h", help="The Ollama model to use.")
+    parser.add_argument("--keep-alive", type=str, default="30m", help="How long Ollama keeps the model loaded between messages, e.g. 30m, 1h, or --keep-alive=-1m to keep it loaded (the = is needed for a negative value).")
+    parser.add_argument("--no-warm-up", action="store_true", help="Skip loading the model and system prompt before the first message.")
+    parser.add_argument("--log-level", type=str, default="WARNING", help="Log level, e.g. DEBUG to see tool calls.")
     args = parser.parse_args()
 
+    configure_logging(args.log_level)
+
     calculator_tool = CalculatorTool()
-    agent = Agent(model=args.model, tools=[calculator_tool])
+    agent = Agent(model=args.model, tools=[calculator_tool], keep_alive=args.keep_alive)
+    if not args.no_warm_up:
+        agent.warm_up()
 
     print("Agent is ready. Ask a question that might require calculation. Type 'exit' or 'quit' to end.")
 
@@ -2,7 +2,7 @@
 from typing import Dict, List
 from google.adk.agents import Agent
 from google.adk.tools import google_search
-import yfinance as yf
+from .market_data import format_quote, get_quotes
 
 def get_financial_context(tickers: List[str]) -> Dict[str, str]:
     """
@@ -15,29 +15,20 @@ def get_financial_context(tickers: List[str]) -> Dict[str, str]:
     Returns:
         A dictionary mapping each ticker to its formatted financial data string.
     """
+    try:
+        # One batched request for every ticker not already in the shared quote cache
+        quotes = get_quotes(tickers)
+    except Exception:
+        # Network or yfinance errors should not break the agent's turn
+        return {ticker_symbol: "Invalid Ticker or Data Error" for ticker_symbol in tickers}
+
     financial_data: Dict[str, str] = {}
     for ticker_symbol in tickers:
-        try:
-            # Create a Ticker object
-            stock = yf.Ticker(ticker_symbol)
-
-            # Fetch the info dictionary
-            info = stock.info
-
-            # Safely access the required data points
-            price = info.get("currentPrice") or info.get("regularMarketPrice")
-            change_percent = info.get("regularMarketChangePercent")
-
-            if price is not None and change_percent is not None:
-                # Format the percentage and the final string
-                change_str = f"{change_percent * 100:+.2f}%"
-                financial_data[ticker_symbol] = f"${price:.2f} ({change_str})"
-            else:
-                # Handle cases where the ticker is valid but data is missing
-                financial_data[ticker_symbol] = "Price data not available."
-
-        except Exception:
-            # This handles invalid tickers or other yfinance errors gracefully
+        symbol = ticker_symbol.strip().upper()
+        if symbol in quotes:
+            financial_data[ticker_symbol] = format_quote(quotes[symbol])
+        else:
+            # yfinance has no data at all for invalid tickers
             financial_data[ticker_symbol] = "Invalid Ticker or Data Error"
 
     return financial_data
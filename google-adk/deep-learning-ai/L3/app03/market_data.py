@@ -0,0 +1,154 @@
+"""Market data for the news agent's `get_financial_context` tool.
+
+Quotes for all requested tickers are fetched in one batched yfinance request
+and kept in a short-lived cache shared by every session in the process, so a
+news turn with ten tickers costs at most one round trip instead of ten full
+`Ticker.info` downloads. The data source is pluggable: swap in a
+`FixtureSource` to run the agent or its tests without network access.
+"""
+import json
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (price, change as a fraction of the previous close), or None when the ticker
+# is known but has no price right now
+Quote = Optional[Tuple[float, float]]
+
+class YFinanceSource:
+    """Fetch quotes for many tickers with a single `yf.download` call."""
+
+    def __init__(self, timeout: float = 10):
+        self.timeout = timeout
+
+    def fetch(self, tickers: List[str]) -> Dict[str, Quote]:
+        """
+        Args:
+            tickers: Upper-case ticker symbols.
+
+        Returns:
+            A quote per ticker that yfinance knows. Unknown tickers are left out.
+        """
+        import yfinance as yf
+
+        # A few days of daily bars, so the previous close is there across weekends and holidays
+        history = yf.download(
+            tickers,
+            period="5d",
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=True,
+            timeout=self.timeout,
+        )
+        quotes: Dict[str, Quote] = {}
+        for ticker in tickers:
+            try:
+                # Older yfinance versions drop the ticker level when only one is requested
+                frame = history[ticker] if history.columns.nlevels > 1 else history
+                closes = frame["Close"].dropna()
+            except KeyError:
+                continue
+            if closes.empty:
+                # yfinance returns an empty column for unknown or delisted tickers
+                continue
+            if len(closes) < 2:
+                quotes[ticker] = None
+                continue
+            price, previous = float(closes.iloc[-1]), float(closes.iloc[-2])
+            quotes[ticker] = (price, price / previous - 1) if previous else None
+        return quotes
+
+class FixtureSource:
+    """Serve quotes from a dict or a JSON file, for tests and offline runs.
+
+    The JSON file maps tickers to `[price, change]` pairs, or to null for a
+    ticker without price data.
+    """
+
+    def __init__(self, quotes: Optional[Dict[str, Quote]] = None, path: Optional[str] = None):
+        if path is not None:
+            with open(path) as f:
+                quotes = json.load(f)
+        self.quotes = {ticker.upper(): tuple(quote) if quote else None for ticker, quote in (quotes or {}).items()}
+        self.calls: List[List[str]] = []
+
+    def fetch(self, tickers: List[str]) -> Dict[str, Quote]:
+        self.calls.append(list(tickers))
+        return {ticker: self.quotes[ticker] for ticker in tickers if ticker in self.quotes}
+
+class QuoteCache:
+    """Thread-safe TTL cache of quotes, shared across sessions."""
+
+    def __init__(self, ttl: float = 60, max_entries: int = 2048):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Tuple[float, Quote]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, tickers: Iterable[str]) -> Tuple[Dict[str, Quote], List[str]]:
+        """Return (cached quotes, tickers that still need fetching)."""
+        now = time.monotonic()
+        found: Dict[str, Quote] = {}
+        missing: List[str] = []
+        with self._lock:
+            for ticker in tickers:
+                entry = self._entries.get(ticker)
+                if entry is not None and entry[0] > now:
+                    found[ticker] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.append(ticker)
+                    self.misses += 1
+        return found, missing
+
+    def set_many(self, quotes: Dict[str, Quote]):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries.update((ticker, (expires, quote)) for ticker, quote in quotes.items())
+            if len(self._entries) > self.max_entries:
+                # Dicts keep insertion order, so the oldest entries go first
+                for ticker in list(self._entries)[: len(self._entries) - self.max_entries]:
+                    del self._entries[ticker]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+_source = YFinanceSource()
+quote_cache = QuoteCache()
+
+def set_source(source):
+    """Replace the data source (anything with a `fetch(tickers)` method) and drop cached quotes."""
+    global _source
+    _source = source
+    quote_cache.clear()
+
+def get_quotes(tickers: List[str]) -> Dict[str, Quote]:
+    """
+    Quotes for the tickers, from the cache where possible and otherwise from
+    one batched request to the data source.
+
+    Raises:
+        Whatever the data source raises if the batched request fails.
+    """
+    symbols = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers))
+    quotes, missing = quote_cache.get_many(symbols)
+    if missing:
+        fetched = _source.fetch(missing)
+        # Only tickers with a price are cached, so missing data is retried next turn
+        quote_cache.set_many({ticker: quote for ticker, quote in fetched.items() if quote is not None})
+        quotes.update(fetched)
+    return quotes
+
+def format_quote(quote: Quote) -> str:
+    if quote is None:
+        return "Price data not available."
+    price, change = quote
+    return f"${price:.2f} ({change * 100:+.2f}%)"
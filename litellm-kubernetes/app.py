@@ -1,9 +1,9 @@
 
-import os
 from flask import Flask, request, jsonify
-from litellm import completion
+from config import Settings
 
 app = Flask(__name__)
+settings = Settings()
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -11,22 +11,25 @@ def chat():
     messages = data.get('messages')
     temperature = data.get('temperature', 0.7)
 
-    # LiteLLM setup
-    model_name = os.environ.get("MODEL_NAME", "ollama/qwen3:8b")
-    api_base = os.environ.get("API_BASE", "http://ollama.default.svc.cluster.local:11434")
-    api_key = os.environ.get("API_KEY")
-
     try:
+        # LiteLLM takes seconds to import, so it is loaded on first use (or by /ready)
+        from litellm import completion
         response = completion(
-            model=model_name,
+            model=settings.model_name,
             messages=messages,
-            api_base=api_base,
-            api_key=api_key,
+            api_base=settings.api_base,
+            api_key=settings.api_key,
             temperature=temperature
         )
-        return jsonify(response)
+        return jsonify(response.model_dump())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Readiness probe: load LiteLLM before the first request is routed here
+    import litellm
+    return jsonify({"ready": True})
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
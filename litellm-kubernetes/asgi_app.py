@@ -0,0 +1,360 @@
+import contextlib
+import json
+import logging
+import threading
+import time
+import anyio
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from cache import ResponseCache, SingleFlight, request_key
+from config import Settings
+from metrics import (
+    CACHE_REQUESTS, MODEL_CALL_SECONDS, QUEUE_DEPTH, QUEUE_WAIT_SECONDS, REQUEST_SECONDS,
+    TIME_TO_FIRST_TOKEN_SECONDS, configure_logging, log, record_usage, render, span, timed,
+)
+from router import NoBackendAvailable, Router, conversation_key, is_backend_error
+from scheduler import QueueFull, Scheduler
+
+# Loaded once at startup instead of on every request
+settings = Settings()
+configure_logging(settings.log_level)
+
+class Backend:
+    """Shared state for talking to the model backends: one pooled HTTP client, the admission scheduler and the replica router"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.http_client = None
+        self.llm_client = None
+        # LiteLLM takes seconds to import, so it is loaded after the server is up (see prepare)
+        self.acompletion = None
+        self.ready = False
+        self._load_lock = threading.Lock()
+        self.scheduler = Scheduler(
+            default_limit=settings.max_concurrency,
+            limits=settings.model_concurrency,
+            max_queue=settings.max_queue,
+        )
+        self.router = Router(
+            settings.api_bases,
+            strategy=settings.routing_strategy,
+            failure_threshold=settings.circuit_failures,
+            cooldown=settings.circuit_cooldown,
+            slow_threshold=settings.slow_threshold,
+        )
+
+    async def start(self):
+        limits = httpx.Limits(
+            max_connections=self.settings.max_connections,
+            max_keepalive_connections=self.settings.max_keepalive_connections,
+        )
+        self.http_client = httpx.AsyncClient(limits=limits, timeout=self.settings.request_timeout)
+
+    def load_litellm(self):
+        """Import LiteLLM on first use and point it at the shared connection pool"""
+        if self.acompletion is not None:
+            return self.acompletion
+        with self._load_lock:
+            if self.acompletion is not None:
+                return self.acompletion
+            import litellm
+            from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+
+            # Ollama goes through LiteLLM's own HTTP handler; point it at the shared pool.
+            # Other providers expect their SDK client here, so they get None.
+            if self.settings.model_name.startswith(("ollama/", "ollama_chat/")):
+                self.llm_client = AsyncHTTPHandler(timeout=self.settings.request_timeout)
+                self.llm_client.client = self.http_client
+            # OpenAI-compatible providers pick up the module-level session instead
+            litellm.aclient_session = self.http_client
+            self.acompletion = litellm.acompletion
+            return self.acompletion
+
+    async def prepare(self):
+        """
+        Get the worker ready for traffic: load LiteLLM and, with PREWARM, send a
+        one-token completion to every backend so the model is loaded and the
+        connections are open before the first real request. /ready reports 503
+        until this has finished.
+        """
+        started = time.perf_counter()
+        # Imported on a worker thread so the server is already listening (and answering /healthz)
+        await anyio.to_thread.run_sync(self.load_litellm)
+        if self.settings.prewarm:
+            async with anyio.create_task_group() as group:
+                for replica in self.router.replicas:
+                    group.start_soon(self.warm_up, replica.url)
+        self.ready = True
+        log(logging.INFO, "worker ready", seconds=round(time.perf_counter() - started, 3), prewarm=self.settings.prewarm)
+
+    async def warm_up(self, api_base):
+        try:
+            with anyio.fail_after(self.settings.prewarm_timeout):
+                await self.acompletion(
+                    model=self.settings.model_name,
+                    messages=[{"role": "user", "content": "Hi"}],
+                    api_base=api_base,
+                    api_key=self.settings.api_key,
+                    max_tokens=1,
+                    client=self.llm_client,
+                )
+        except Exception as e:
+            # A backend that is down must not keep the worker out of service; the router handles it
+            log(logging.WARNING, "prewarm failed", backend=api_base, error=str(e) or type(e).__name__)
+
+    async def stop(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority):
+        """Wait for a scheduler slot, recording how long the request queued"""
+        queued_at = time.perf_counter()
+        async with self.scheduler.slot(self.settings.model_name, priority):
+            QUEUE_WAIT_SECONDS.labels(self.settings.model_name).observe(time.perf_counter() - queued_at)
+            yield
+
+    async def completion(self, messages, temperature, priority="normal"):
+        acompletion = self.load_litellm()
+
+        async def complete(api_base):
+            with span("gateway.model_call", model=self.settings.model_name, api_base=api_base), \
+                    timed(MODEL_CALL_SECONDS, self.settings.model_name):
+                response = await acompletion(
+                    model=self.settings.model_name,
+                    messages=messages,
+                    api_base=api_base,
+                    api_key=self.settings.api_key,
+                    temperature=temperature,
+                    client=self.llm_client,
+                )
+            record_usage(self.settings.model_name, response)
+            return response
+
+        async with self.slot(priority):
+            return await self.router.call(complete, affinity_key=conversation_key(messages))
+
+    async def stream(self, messages, temperature, priority="normal"):
+        """Yield completion chunks as the backend produces them"""
+        acompletion = self.load_litellm()
+        async with self.slot(priority):
+            last_error = None
+            for replica in self.router.candidates(conversation_key(messages)):
+                streaming = False
+                try:
+                    with self.router.track(replica) as attempt:
+                        started = time.perf_counter()
+                        response = await acompletion(
+                            model=self.settings.model_name,
+                            messages=messages,
+                            api_base=replica.url,
+                            api_key=self.settings.api_key,
+                            temperature=temperature,
+                            client=self.llm_client,
+                            stream=True,
+                        )
+                        try:
+                            async for chunk in response:
+                                if not streaming:
+                                    TIME_TO_FIRST_TOKEN_SECONDS.labels(self.settings.model_name).observe(time.perf_counter() - started)
+                                attempt.responded()
+                                streaming = True
+                                record_usage(self.settings.model_name, chunk)
+                                yield chunk
+                        finally:
+                            # Also runs when the client disconnects and the response is cancelled.
+                            # Closing the upstream connection makes Ollama stop generating.
+                            with anyio.CancelScope(shield=True):
+                                await response.aclose()
+                    return
+                except Exception as e:
+                    # Fail over only before anything was sent to the client
+                    if streaming or not is_backend_error(e):
+                        raise
+                    log(logging.WARNING, "backend failed, trying the next one", backend=replica.url, error=str(e))
+                    last_error = e
+            raise NoBackendAvailable(f"All backends failed, last error: {last_error}") from last_error
+
+backend = Backend(settings)
+cache = ResponseCache(
+    max_entries=settings.cache_max_entries,
+    ttl=settings.cache_ttl,
+    db_path=settings.cache_db_path,
+) if settings.cache_enabled else None
+flights = SingleFlight()
+QUEUE_DEPTH.set_function(lambda: backend.scheduler.queued)
+
+async def cached_completion(messages, temperature, priority):
+    """
+    Return (response dict, cache status). Deterministic requests are served
+    from the cache when possible, and identical requests already in flight
+    share one upstream call.
+    """
+    async def complete():
+        response = await backend.completion(messages, temperature, priority)
+        return response.model_dump()
+
+    if cache is None or temperature != 0:
+        return await complete(), "BYPASS"
+
+    key = request_key(settings.model_name, messages, temperature)
+    cached = await cache.aget(key)
+    if cached is not None:
+        return cached, "HIT"
+
+    async def complete_and_store():
+        response = await complete()
+        await cache.aset(key, response)
+        return response
+
+    return await flights.do(key, complete_and_store), "MISS"
+
+def too_many_requests(error):
+    return JSONResponse({"error": str(error)}, status_code=429, headers={"Retry-After": str(error.retry_after)})
+
+def bad_request(message):
+    return JSONResponse({"error": message}, status_code=400)
+
+async def read_chat_request(request):
+    """
+    Parse and check a chat request body.
+
+    Returns:
+        tuple: (data, None) for a valid request, or (None, a 400 response)
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        # JSONDecodeError, or a body that is not UTF-8
+        return None, bad_request("Request body is not valid JSON")
+    if not isinstance(data, dict):
+        return None, bad_request("Request body must be a JSON object")
+    messages = data.get('messages')
+    if not isinstance(messages, list):
+        return None, bad_request("'messages' must be a list")
+    if not all(isinstance(message, dict) and isinstance(message.get('role'), str) for message in messages):
+        return None, bad_request("Every message must be an object with a string 'role'")
+    return data, None
+
+def sse_response(messages, temperature, priority):
+    """Proxy streamed completion chunks to the client as Server-Sent Events"""
+    try:
+        backend.scheduler.check_admission(settings.model_name)
+    except QueueFull as e:
+        return too_many_requests(e)
+
+    async def events():
+        try:
+            async for chunk in backend.stream(messages, temperature, priority):
+                yield f"data: {json.dumps(chunk.model_dump())}\n\n"
+            yield "data: [DONE]\n\n"
+        except QueueFull as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e), 'retry_after': e.retry_after})}\n\n"
+        except Exception as e:
+            log(logging.ERROR, "stream failed", error=str(e))
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def instrumented(route):
+    """Record the latency and status code of a route handler"""
+    def decorator(handler):
+        async def wrapper(request):
+            start = time.perf_counter()
+            status = 500
+            try:
+                with span("gateway.request", route=route):
+                    response = await handler(request)
+                status = response.status_code
+                return response
+            finally:
+                # For streaming responses this is the time until the headers are sent
+                REQUEST_SECONDS.labels(route, str(status)).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+@instrumented("/chat")
+async def chat(request):
+    data, error = await read_chat_request(request)
+    if error is not None:
+        return error
+    messages = data.get('messages')
+    temperature = data.get('temperature', 0.7)
+    priority = data.get('priority', 'normal')
+
+    if data.get('stream'):
+        return sse_response(messages, temperature, priority)
+
+    try:
+        response, cache_status = await cached_completion(messages, temperature, priority)
+        CACHE_REQUESTS.labels(cache_status).inc()
+        return JSONResponse(response, headers={"X-Cache": cache_status})
+    except QueueFull as e:
+        return too_many_requests(e)
+    except Exception as e:
+        log(logging.ERROR, "chat failed", error=str(e))
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@instrumented("/chat/stream")
+async def chat_stream(request):
+    data, error = await read_chat_request(request)
+    if error is not None:
+        return error
+    return sse_response(data.get('messages'), data.get('temperature', 0.7), data.get('priority', 'normal'))
+
+async def scheduler_stats(request):
+    return JSONResponse(backend.scheduler.stats())
+
+async def router_stats(request):
+    return JSONResponse(backend.router.stats())
+
+async def healthz(request):
+    """Liveness: the process is serving requests"""
+    return JSONResponse({"status": "ok"})
+
+async def ready(request):
+    """Readiness: LiteLLM is loaded and, with PREWARM, the backends have been warmed up"""
+    return JSONResponse({"ready": backend.ready}, status_code=200 if backend.ready else 503)
+
+async def metrics(request):
+    body, content_type = render()
+    return Response(body, media_type=content_type)
+
+async def purge_cache():
+    """Delete expired responses every CACHE_PURGE_INTERVAL seconds"""
+    while True:
+        await anyio.sleep(settings.cache_purge_interval)
+        try:
+            await cache.apurge_expired()
+        except Exception as e:
+            log(logging.WARNING, "cache purge failed", error=str(e))
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await backend.start()
+    async with anyio.create_task_group() as group:
+        group.start_soon(backend.prepare)
+        if cache is not None and settings.cache_purge_interval > 0:
+            group.start_soon(purge_cache)
+        yield
+        group.cancel_scope.cancel()
+    await backend.stop()
+
+app = Starlette(
+    routes=[
+        Route('/chat', chat, methods=['POST']),
+        Route('/chat/stream', chat_stream, methods=['POST']),
+        Route('/scheduler/stats', scheduler_stats, methods=['GET']),
+        Route('/router/stats', router_stats, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+        Route('/healthz', healthz, methods=['GET']),
+        Route('/ready', ready, methods=['GET']),
+    ],
+    lifespan=lifespan,
+)
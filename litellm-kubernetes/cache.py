@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import anyio
+
+def request_key(model, messages, temperature, **params):
+    """
+    Content-addressed key for a chat request.
+
+    The request is serialized canonically (sorted keys, no whitespace) so that
+    payloads that differ only in key order or formatting share a key.
+    """
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, **params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class ResponseCache:
+    """LRU cache of chat responses with a TTL.
+
+    Entries live in memory and, when ``db_path`` is set, also in a SQLite file
+    so that several uvicorn workers (or pods sharing a volume) reuse each
+    other's responses. A hit in SQLite is promoted into the memory tier.
+
+    ``aget`` and ``aset`` are for the event loop: they answer from memory
+    inline and run the SQLite tier on a worker thread, so a busy database file
+    (locks held by other workers) does not stall every other request.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._db = None
+        # One connection shared by the worker threads
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=1, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires REAL, value TEXT)")
+
+    def _get_memory(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires > now:
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+        return None
+
+    # The SQLite tier is only a shared cache: when the file stays locked past the
+    # timeout, a lookup counts as a miss and a write is dropped
+    def _load(self, key, now):
+        try:
+            with self._db_lock:
+                row = self._db.execute("SELECT expires, value FROM responses WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        if row is not None and row[0] > now:
+            return row[0], json.loads(row[1])
+        return None
+
+    def _store(self, key, expires, value):
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, expires, value) VALUES (?, ?, ?)",
+                    (key, expires, json.dumps(value, separators=(",", ":"))),
+                )
+        except sqlite3.OperationalError:
+            pass
+
+    def _found(self, key, value, row):
+        if value is None and row is not None:
+            self._remember(key, *row)
+            value = row[1]
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get(self, key):
+        now = time.time()
+        value = self._get_memory(key, now)
+        row = self._load(key, now) if value is None and self._db is not None else None
+        return self._found(key, value, row)
+
+    async def aget(self, key):
+        """get() for the event loop, with the SQLite lookup on a worker thread"""
+        now = time.time()
+        value = self._get_memory(key, now)
+        row = await anyio.to_thread.run_sync(self._load, key, now) if value is None and self._db is not None else None
+        return self._found(key, value, row)
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl
+        self._remember(key, expires, value)
+        if self._db is not None:
+            self._store(key, expires, value)
+
+    async def aset(self, key, value):
+        """set() for the event loop, with the SQLite write on a worker thread"""
+        expires = time.time() + self.ttl
+        self._remember(key, expires, value)
+        if self._db is not None:
+            await anyio.to_thread.run_sync(self._store, key, expires, value)
+
+    def _remember(self, key, expires, value):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _purge_memory(self, now):
+        for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+
+    def _purge_db(self, now):
+        try:
+            with self._db_lock:
+                self._db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        except sqlite3.OperationalError:
+            # Another worker holds the lock; the next purge deletes the rows
+            pass
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers"""
+        now = time.time()
+        self._purge_memory(now)
+        if self._db is not None:
+            self._purge_db(now)
+
+    async def apurge_expired(self):
+        """purge_expired() for the event loop, with the SQLite delete on a worker thread"""
+        now = time.time()
+        self._purge_memory(now)
+        if self._db is not None:
+            await anyio.to_thread.run_sync(self._purge_db, now)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one upstream call.
+
+    The first caller starts the call; callers that arrive while it is running
+    await the same result. The call is shielded, so a disconnecting client
+    does not cancel the generation other callers are waiting for.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn):
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(call)
+
+    def __len__(self):
+        return len(self._calls)
@@ -0,0 +1,49 @@
+import os
+
+class Settings:
+    """Gateway configuration, read from the environment once at startup.
+
+    The values come from the litellm-config ConfigMap and litellm-secret Secret
+    in kubernetes/deployment.yaml, which only change on a rollout restart, so
+    there is no need to reread them on every request.
+    """
+
+    def __init__(self, environ=None):
+        environ = os.environ if environ is None else environ
+        self.model_name = environ.get("MODEL_NAME", "ollama/qwen3:8b")
+        self.api_base = environ.get("API_BASE", "http://ollama.default.svc.cluster.local:11434")
+        # Comma-separated pool of backends to route across; defaults to API_BASE alone
+        self.api_bases = [url.strip() for url in environ.get("API_BASES", "").split(",") if url.strip()] or [self.api_base]
+        self.routing_strategy = environ.get("ROUTING_STRATEGY", "least_loaded")
+        # Circuit breaker: skip a backend for CIRCUIT_COOLDOWN seconds after
+        # CIRCUIT_FAILURES consecutive errors or responses slower than SLOW_THRESHOLD
+        self.circuit_failures = int(environ.get("CIRCUIT_FAILURES", "3"))
+        self.circuit_cooldown = float(environ.get("CIRCUIT_COOLDOWN", "30"))
+        self.slow_threshold = float(environ["SLOW_THRESHOLD"]) if environ.get("SLOW_THRESHOLD") else None
+        self.api_key = environ.get("API_KEY") or None
+        # Requests allowed in flight to each model at once; the rest wait
+        self.max_concurrency = int(environ.get("MAX_CONCURRENCY", "64"))
+        # Per-model overrides, e.g. "ollama/qwen3:8b=4,ollama/llama3=8"
+        self.model_concurrency = {
+            model.strip(): int(limit)
+            for model, limit in (item.split("=", 1) for item in environ.get("MODEL_CONCURRENCY", "").split(",") if "=" in item)
+        }
+        # Requests allowed to wait for a slot before new ones get a 429
+        self.max_queue = int(environ.get("MAX_QUEUE", "256"))
+        # Keep-alive connection pool to the backend
+        self.max_connections = int(environ.get("MAX_CONNECTIONS", "100"))
+        self.max_keepalive_connections = int(environ.get("MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.request_timeout = float(environ.get("REQUEST_TIMEOUT", "300"))
+        # Response cache, only used for deterministic requests (temperature 0)
+        self.cache_enabled = environ.get("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.cache_ttl = float(environ.get("CACHE_TTL", "300"))
+        self.cache_max_entries = int(environ.get("CACHE_MAX_ENTRIES", "1024"))
+        # Optional SQLite file shared by all workers in the pod
+        self.cache_db_path = environ.get("CACHE_DB_PATH") or None
+        # Seconds between deletions of expired responses, which would otherwise stay in the SQLite file
+        self.cache_purge_interval = float(environ.get("CACHE_PURGE_INTERVAL", "60"))
+        # Send a one-token completion to every backend at startup, before reporting ready
+        self.prewarm = environ.get("PREWARM", "false").lower() in ("1", "true", "yes")
+        self.prewarm_timeout = float(environ.get("PREWARM_TIMEOUT", "120"))
+        # Level for the gateway's structured JSON logs
+        self.log_level = environ.get("LOG_LEVEL", "INFO").upper()
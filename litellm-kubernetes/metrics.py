@@ -0,0 +1,64 @@
+import contextlib
+import json
+import logging
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("litellm-gateway")
+except ImportError:
+    _tracer = None
+
+logger = logging.getLogger("gateway")
+
+REQUEST_SECONDS = Histogram("gateway_request_seconds", "End-to-end latency of a gateway request", ["route", "status"])
+MODEL_CALL_SECONDS = Histogram("gateway_model_call_seconds", "Latency of one backend completion call", ["model"])
+TIME_TO_FIRST_TOKEN_SECONDS = Histogram("gateway_time_to_first_token_seconds", "Time until the first streamed chunk", ["model"])
+QUEUE_WAIT_SECONDS = Histogram("gateway_queue_wait_seconds", "Time spent waiting for a concurrency slot", ["model"])
+PROMPT_TOKENS = Counter("gateway_prompt_tokens", "Prompt tokens reported by the backend", ["model"])
+COMPLETION_TOKENS = Counter("gateway_completion_tokens", "Completion tokens reported by the backend", ["model"])
+CACHE_REQUESTS = Counter("gateway_cache_requests", "Chat requests by response cache status", ["status"])
+QUEUE_DEPTH = Gauge("gateway_queue_depth", "Requests waiting for a concurrency slot")
+
+def configure_logging(level="INFO"):
+    """Write gateway events to stderr, one JSON object per line"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+def log(level, event, **fields):
+    """Log one event as a JSON object, skipping the formatting below the configured level"""
+    if logger.isEnabledFor(level):
+        logger.log(level, json.dumps({"event": event, **fields}, default=str))
+
+def record_usage(model, response):
+    """Count the tokens in a completion's usage block, if the backend reported one"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    PROMPT_TOKENS.labels(model).inc(getattr(usage, "prompt_tokens", 0) or 0)
+    COMPLETION_TOKENS.labels(model).inc(getattr(usage, "completion_tokens", 0) or 0)
+
+@contextlib.contextmanager
+def timed(histogram, *labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - start)
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """An OpenTelemetry span when opentelemetry is installed, otherwise nothing"""
+    if _tracer is None:
+        yield
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes):
+        yield
+
+def render():
+    """Current metrics in the Prometheus text format, with its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,150 @@
+import contextlib
+import hashlib
+import json
+import time
+
+class NoBackendAvailable(Exception):
+    """Raised when every backend failed for a request"""
+
+def conversation_key(messages):
+    """
+    Stable key for a conversation: the messages up to and including the first
+    user message, which do not change as the conversation grows.
+    """
+    prefix = []
+    for message in messages or []:
+        prefix.append(message)
+        if message.get('role') == 'user':
+            break
+    return hashlib.sha256(json.dumps(prefix, sort_keys=True).encode()).hexdigest()
+
+def is_backend_error(error):
+    """
+    Whether an error says something about the replica rather than the request.
+    Bad or unauthorized requests would fail the same way on every replica, so
+    they neither trip the circuit breaker nor trigger failover. A 404 still
+    counts, since Ollama returns it when a replica has not pulled the model.
+    """
+    return getattr(error, "status_code", None) not in (400, 401, 403, 413, 422)
+
+class Replica:
+    """One model backend, with its load, latency and circuit breaker state"""
+
+    def __init__(self, url):
+        self.url = url
+        self.in_flight = 0
+        self.latency = None
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def available(self, now):
+        # After the cooldown the replica gets traffic again (half-open). Its failure
+        # count is only reset by a success, so one more failure reopens the circuit.
+        return self.open_until <= now
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "latency_ewma": self.latency,
+            "consecutive_failures": self.consecutive_failures,
+            "circuit_open": self.open_until > time.monotonic(),
+        }
+
+class _Attempt:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.latency = None
+
+    def responded(self):
+        """Mark the response as started, e.g. on the first streamed chunk"""
+        if self.latency is None:
+            self.latency = time.monotonic() - self.started
+
+class Router:
+    """Spread requests over a pool of Ollama replicas.
+
+    ``least_loaded`` picks the replica with the fewest requests in flight (ties
+    broken by latency EWMA). ``prefix_affinity`` sends each conversation to the
+    same replica, chosen by rendezvous hashing, so it hits a warm KV cache.
+    Either way the remaining healthy replicas follow as failover candidates.
+    A replica that fails, or answers slower than ``slow_threshold``,
+    ``failure_threshold`` times in a row is skipped for ``cooldown`` seconds.
+    """
+
+    STRATEGIES = ("least_loaded", "prefix_affinity")
+
+    def __init__(self, urls, strategy="least_loaded", failure_threshold=3, cooldown=30.0, slow_threshold=None, alpha=0.2):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown routing strategy: {strategy!r} (expected one of {self.STRATEGIES})")
+        self.replicas = [Replica(url) for url in urls]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slow_threshold = slow_threshold
+        self.alpha = alpha
+
+    def candidates(self, affinity_key=None):
+        """Replicas to try for a request, best first"""
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if replica.available(now)]
+        # With every circuit open, probe all replicas rather than failing outright
+        pool = healthy or self.replicas
+
+        if self.strategy == "prefix_affinity" and affinity_key is not None:
+            return sorted(pool, key=lambda replica: hashlib.sha256(f"{affinity_key}:{replica.url}".encode()).digest())
+        return sorted(pool, key=lambda replica: (replica.in_flight, replica.latency or 0.0))
+
+    @contextlib.contextmanager
+    def track(self, replica):
+        """Count a request against a replica and record how it went"""
+        attempt = _Attempt()
+        replica.in_flight += 1
+        try:
+            yield attempt
+        except Exception as e:
+            if is_backend_error(e):
+                self._record_failure(replica)
+            raise
+        else:
+            attempt.responded()
+            self._record_success(replica, attempt.latency)
+        finally:
+            replica.in_flight -= 1
+
+    async def call(self, fn, affinity_key=None):
+        """
+        Run ``await fn(url)`` against the best replica, failing over to the next
+        one on errors.
+
+        Args:
+            fn: Coroutine function taking the replica's base URL
+            affinity_key (str): Conversation key for prefix affinity routing
+        Returns:
+            The result of the first successful call
+        """
+        last_error = None
+        for replica in self.candidates(affinity_key):
+            try:
+                with self.track(replica):
+                    return await fn(replica.url)
+            except Exception as e:
+                if not is_backend_error(e):
+                    raise
+                last_error = e
+        raise NoBackendAvailable(f"All backends failed, last error: {last_error}") from last_error
+
+    def _record_success(self, replica, latency):
+        replica.latency = latency if replica.latency is None else (1 - self.alpha) * replica.latency + self.alpha * latency
+        if self.slow_threshold is not None and latency > self.slow_threshold:
+            self._record_failure(replica)
+            return
+        replica.consecutive_failures = 0
+        replica.open_until = 0.0
+
+    def _record_failure(self, replica):
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= self.failure_threshold:
+            replica.open_until = time.monotonic() + self.cooldown
+
+    def stats(self):
+        return {"strategy": self.strategy, "backends": {replica.url: replica.stats() for replica in self.replicas}}
@@ -0,0 +1,126 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+class QueueFull(Exception):
+    """Raised when a request cannot even be queued; the client should retry later"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many queued requests, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class _ModelState:
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters = []
+        # Running average of how long a request holds a slot, used for Retry-After
+        self.service_time = 1.0
+
+class Scheduler:
+    """Admission control in front of the model backend.
+
+    Each model gets its own concurrency cap. Requests over the cap wait in a
+    priority queue (high before normal before low, FIFO within a class), and
+    once ``max_queue`` requests are waiting new ones are rejected immediately
+    with a Retry-After estimate instead of piling up on the backend.
+    """
+
+    def __init__(self, default_limit, limits=None, max_queue=256):
+        self.default_limit = default_limit
+        self.limits = limits or {}
+        self.max_queue = max_queue
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._models = {}
+        self._sequence = itertools.count()
+        self._wait_times = deque(maxlen=1024)
+
+    def _state(self, model):
+        if model not in self._models:
+            self._models[model] = _ModelState(self.limits.get(model, self.default_limit))
+        return self._models[model]
+
+    @contextlib.asynccontextmanager
+    async def slot(self, model, priority="normal"):
+        """Hold one of the model's concurrency slots for the duration of the block"""
+        state = self._state(model)
+        queued_at = time.monotonic()
+        await self._acquire(state, PRIORITIES.get(priority, PRIORITIES["normal"]))
+        started_at = time.monotonic()
+        self._wait_times.append(started_at - queued_at)
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            state.service_time = 0.9 * state.service_time + 0.1 * (time.monotonic() - started_at)
+            self._release(state)
+
+    def check_admission(self, model):
+        """
+        Raise QueueFull if a request for the model would be rejected right now.
+        Lets streaming endpoints answer 429 before committing to a 200 response.
+        """
+        state = self._state(model)
+        if state.in_flight >= state.limit and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self._retry_after(state))
+
+    async def _acquire(self, state, priority):
+        if state.in_flight < state.limit and not state.waiters:
+            state.in_flight += 1
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self._retry_after(state))
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(state.waiters, (priority, next(self._sequence), waiter))
+        self.queued += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as we were cancelled
+            if waiter.done() and not waiter.cancelled():
+                self._release(state)
+            raise
+        finally:
+            self.queued -= 1
+
+    def _release(self, state):
+        state.in_flight -= 1
+        while state.waiters:
+            _, _, waiter = heapq.heappop(state.waiters)
+            if not waiter.done():
+                # Hand the slot straight to the next waiter
+                state.in_flight += 1
+                waiter.set_result(None)
+                break
+
+    def _retry_after(self, state):
+        return max(1, math.ceil(self.queued / max(state.limit, 1) * state.service_time))
+
+    def stats(self):
+        waits = sorted(self._wait_times)
+
+        def percentile(p):
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        return {
+            "queue_depth": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_seconds_p50": percentile(0.5),
+            "wait_seconds_p99": percentile(0.99),
+            "models": {
+                model: {"in_flight": state.in_flight, "limit": state.limit, "queued": len(state.waiters)}
+                for model, state in self._models.items()
+            },
+        }
@@ -0,0 +1,6 @@
+import pytest
+
+# The gateway runs on uvicorn's asyncio loop, so the async tests only run there
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,24 @@
+import pytest
+from starlette.testclient import TestClient
+
+import asgi_app
+
+# Without the lifespan, so the requests below never reach LiteLLM or a backend
+client = TestClient(asgi_app.app)
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+@pytest.mark.parametrize("body", [
+    b"{bad",
+    b"\xff\xfe",
+    b"[1]",
+    b'{"temperature": 0}',
+    b'{"messages": "hi"}',
+    b'{"messages": ["hi"]}',
+    b'{"messages": [[1]]}',
+    b'{"messages": [{"content": "hi"}]}',
+    b'{"messages": [{"role": 1, "content": "hi"}]}',
+])
+def test_malformed_request_is_rejected(path, body):
+    response = client.post(path, content=body)
+    assert response.status_code == 400
+    assert "error" in response.json()
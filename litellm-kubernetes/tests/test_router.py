@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from router import NoBackendAvailable, Router, conversation_key
+
+URLS = ["http://ollama-0:11434", "http://ollama-1:11434", "http://ollama-2:11434"]
+
+class BackendError(Exception):
+    status_code = 503
+
+class BadRequest(Exception):
+    status_code = 400
+
+def test_least_loaded_prefers_fewest_in_flight_then_latency():
+    router = Router(URLS)
+    router.replicas[0].in_flight = 2
+    router.replicas[1].latency = 0.5
+    router.replicas[2].latency = 0.1
+    assert [replica.url for replica in router.candidates()] == [URLS[2], URLS[1], URLS[0]]
+
+def test_prefix_affinity_keeps_a_conversation_on_one_replica():
+    router = Router(URLS, strategy="prefix_affinity")
+    messages = [{"role": "system", "content": "Be brief"}, {"role": "user", "content": "Hi"}]
+    first = router.candidates(conversation_key(messages))[0]
+    # Later turns share the prefix up to the first user message, and load does not move them
+    first.in_flight = 10
+    grown = messages + [{"role": "assistant", "content": "Hello"}, {"role": "user", "content": "More"}]
+    assert router.candidates(conversation_key(grown))[0] is first
+    assert len(router.candidates(conversation_key(grown))) == len(URLS)
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        Router(URLS, strategy="random")
+
+def fail(replica, router):
+    with pytest.raises(BackendError):
+        with router.track(replica):
+            raise BackendError()
+
+def test_circuit_opens_after_failures_and_recovers_half_open():
+    router = Router(URLS[:2], failure_threshold=2, cooldown=0.05)
+    replica = router.replicas[0]
+    fail(replica, router)
+    assert replica in router.candidates()
+    fail(replica, router)
+    assert replica not in router.candidates()
+
+    time.sleep(0.06)
+    # Half-open: back in the pool, but one more failure reopens the circuit
+    assert replica in router.candidates()
+    fail(replica, router)
+    assert replica not in router.candidates()
+
+    time.sleep(0.06)
+    with router.track(replica):
+        pass
+    assert replica.consecutive_failures == 0
+    fail(replica, router)
+    assert replica in router.candidates()
+
+def test_all_circuits_open_probes_every_replica():
+    router = Router(URLS[:2], failure_threshold=1)
+    for replica in router.replicas:
+        fail(replica, router)
+    assert len(router.candidates()) == 2
+
+def test_slow_responses_count_as_failures():
+    router = Router(URLS[:1], failure_threshold=1, slow_threshold=0.01)
+    with router.track(router.replicas[0]):
+        time.sleep(0.02)
+    assert router.replicas[0].consecutive_failures == 1
+
+@pytest.mark.anyio
+async def test_fails_over_to_the_next_backend():
+    router = Router(URLS[:2])
+    router.replicas[1].in_flight = 1
+    tried = []
+
+    async def complete(url):
+        tried.append(url)
+        if url == URLS[0]:
+            raise BackendError()
+        return "answer"
+
+    assert await router.call(complete) == "answer"
+    assert tried == URLS[:2]
+    assert router.replicas[0].consecutive_failures == 1
+    assert router.replicas[1].in_flight == 1
+
+@pytest.mark.anyio
+async def test_request_errors_do_not_fail_over():
+    router = Router(URLS[:2])
+    tried = []
+
+    async def complete(url):
+        tried.append(url)
+        raise BadRequest()
+
+    with pytest.raises(BadRequest):
+        await router.call(complete)
+    assert len(tried) == 1
+    assert router.replicas[0].consecutive_failures == 0
+
+@pytest.mark.anyio
+async def test_every_backend_failing():
+    router = Router(URLS[:2])
+
+    async def complete(url):
+        raise BackendError()
+
+    with pytest.raises(NoBackendAvailable):
+        await router.call(complete)
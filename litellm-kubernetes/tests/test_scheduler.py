@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from starlette.testclient import TestClient
+
+import asgi_app
+from scheduler import QueueFull, Scheduler
+
+MODEL = "ollama/qwen3:8b"
+
+async def hold(scheduler, priority, order, release):
+    async with scheduler.slot(MODEL, priority):
+        order.append(priority)
+        await release.wait()
+
+@pytest.mark.anyio
+async def test_waiters_are_admitted_by_priority_then_arrival():
+    scheduler = Scheduler(default_limit=1)
+    order, release = [], asyncio.Event()
+    first = asyncio.ensure_future(hold(scheduler, "normal", order, release))
+    await asyncio.sleep(0)
+    waiting = []
+    for priority in ("low", "normal", "high", "low", "high"):
+        waiting.append(asyncio.ensure_future(hold(scheduler, priority, order, release)))
+        await asyncio.sleep(0)
+    assert scheduler.queued == 5
+    release.set()
+    await asyncio.gather(first, *waiting)
+    assert order == ["normal", "high", "high", "normal", "low", "low"]
+    assert scheduler.stats()["models"][MODEL]["in_flight"] == 0
+
+@pytest.mark.anyio
+async def test_full_queue_is_rejected():
+    scheduler = Scheduler(default_limit=1, max_queue=1)
+    release = asyncio.Event()
+    tasks = [asyncio.ensure_future(hold(scheduler, "normal", [], release)) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(QueueFull) as error:
+        async with scheduler.slot(MODEL):
+            pass
+    assert error.value.retry_after >= 1
+    with pytest.raises(QueueFull):
+        scheduler.check_admission(MODEL)
+    assert scheduler.rejected == 2
+    release.set()
+    await asyncio.gather(*tasks)
+
+def test_full_queue_answers_429(monkeypatch):
+    scheduler = Scheduler(default_limit=1, max_queue=0)
+    scheduler._state(asgi_app.settings.model_name).in_flight = 1
+    monkeypatch.setattr(asgi_app.backend, "scheduler", scheduler)
+    response = TestClient(asgi_app.app).post("/chat/stream", json={"messages": [{"role": "user", "content": "Hi"}]})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_releases_its_place():
+    scheduler = Scheduler(default_limit=1)
+    release = asyncio.Event()
+    holder = asyncio.ensure_future(hold(scheduler, "normal", [], release))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(hold(scheduler, "normal", [], release))
+    await asyncio.sleep(0)
+    assert scheduler.queued == 1
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert scheduler.queued == 0
+    release.set()
+    await holder
+    assert scheduler.stats()["models"][MODEL]["in_flight"] == 0
+    # The slot is free again, not leaked to the cancelled waiter
+    async with scheduler.slot(MODEL):
+        pass
+
+@pytest.mark.anyio
+async def test_waiter_cancelled_after_being_handed_the_slot_gives_it_back():
+    scheduler = Scheduler(default_limit=1)
+    release = asyncio.Event()
+    holder = asyncio.ensure_future(hold(scheduler, "normal", [], release))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(hold(scheduler, "normal", [], release))
+    await asyncio.sleep(0)
+    release.set()
+    # One step lets the holder finish and hand its slot over; the waiter is cancelled before it runs
+    await asyncio.sleep(0)
+    assert holder.done() and not waiter.done()
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert waiter.cancelled()
+    assert scheduler.stats()["models"][MODEL]["in_flight"] == 0